@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Bounds for the per-worker response cache
+MAX_ENTRIES_PER_USER = 64
+MAX_USERS = 1024
+
+# JSON bodies at least this large are gzip-compressed for clients that accept it
+GZIP_MIN_SIZE = 1024
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+class ResponseCache:
+	"""Per-user LRU of serialized JSON responses, keyed by URL and validated by ETag."""
+
+	def __init__(self, max_entries_per_user: int = MAX_ENTRIES_PER_USER, max_users: int = MAX_USERS):
+		self.max_entries_per_user = max_entries_per_user
+		self.max_users = max_users
+		self._entries: "OrderedDict[int, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, user_id: int, key: str, etag: str) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			user_entries = self._entries.get(user_id)
+			if user_entries is None:
+				return None
+			entry = user_entries.get(key)
+			if entry is None or entry["etag"] != etag:
+				return None
+			self._entries.move_to_end(user_id)
+			user_entries.move_to_end(key)
+			return entry
+
+	def set(self, user_id: int, key: str, etag: str, body: bytes) -> Dict[str, Any]:
+		entry = {"etag": etag, "body": body, "gzip_body": None}
+		with self._lock:
+			user_entries = self._entries.setdefault(user_id, OrderedDict())
+			user_entries[key] = entry
+			user_entries.move_to_end(key)
+			self._entries.move_to_end(user_id)
+			if len(user_entries) > self.max_entries_per_user:
+				user_entries.popitem(last = False)
+			if len(self._entries) > self.max_users:
+				self._entries.popitem(last = False)
+		return entry
+
+	def invalidate(self, user_id: int):
+		with self._lock:
+			self._entries.pop(user_id, None)
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(*parts: Any) -> str:
+	"""Strong ETag derived from the version of the records behind a response."""
+	digest = hashlib.sha256(json.dumps(parts, default = str).encode('utf-8')).hexdigest()
+	return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+	header = request.headers.get("if-none-match")
+	if not header:
+		return False
+	if header.strip() == "*":
+		return True
+	for candidate in header.split(","):
+		candidate = candidate.strip()
+		if candidate.startswith("W/"):
+			candidate = candidate[2:]
+		if candidate.replace(GZIP_ETAG_SUFFIX + '"', '"') == etag:
+			return True
+	return False
+
+
+def cached_json_response(
+	request: Request,
+	user_id: int,
+	etag: str,
+	build: Callable[[], Any]
+) -> Response:
+	"""Answer with 304, a cached body, or the freshly built and cached body.
+
+	`build` is only called when neither the client nor the cache has the
+	representation for `etag`, so callers should keep heavy work inside it.
+	"""
+	headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+	if etag_matches(request, etag):
+		return Response(status_code = 304, headers = headers)
+
+	key = f"{request.url.path}?{request.url.query}"
+	entry = response_cache.get(user_id, key, etag)
+	if entry is None:
+		body = json.dumps(jsonable_encoder(build())).encode('utf-8')
+		entry = response_cache.set(user_id, key, etag, body)
+
+	body = entry["body"]
+	if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+		if entry["gzip_body"] is None:
+			entry["gzip_body"] = gzip.compress(body, compresslevel = 6)
+		headers["ETag"] = etag[:-1] + GZIP_ETAG_SUFFIX + '"'
+		headers["Content-Encoding"] = "gzip"
+		return Response(content = entry["gzip_body"], media_type = "application/json", headers = headers)
+
+	return Response(content = body, media_type = "application/json", headers = headers)
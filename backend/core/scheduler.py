@@ -0,0 +1,171 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+
+from core.config import settings
+
+# Rough throughput used to turn work size into cost (seconds of CPU)
+ANALYZED_ROWS_PER_SECOND = 5000
+PARSED_BYTES_PER_SECOND = 20 * 1024 * 1024
+MIN_COST = 0.01
+
+WAIT_SAMPLES = 1000
+
+
+def analysis_cost(rows: int) -> float:
+	return max(MIN_COST, rows / ANALYZED_ROWS_PER_SECOND)
+
+
+def upload_cost(size: int) -> float:
+	return max(MIN_COST, size / PARSED_BYTES_PER_SECOND)
+
+
+class HeavyOperationScheduler:
+	"""Admission control for CPU-heavy dataset operations.
+
+	At most `max_concurrent` operations run at once and at most
+	`max_per_user` of them belong to one user. Waiting operations are
+	dispatched by weighted fair queueing: each gets a virtual finish tag of
+	max(virtual time, the user's previous finish tag) + cost / weight, and
+	the smallest tag runs next, so a user submitting many large jobs only
+	delays their own later jobs. A user with `max_queued_per_user`
+	operations already waiting gets a 429.
+	"""
+
+	def __init__(self, max_concurrent: int, max_per_user: int, max_queued_per_user: int):
+		self.max_concurrent = max_concurrent
+		self.max_per_user = max_per_user
+		self.max_queued_per_user = max_queued_per_user
+		self._waiting: Dict[int, deque] = defaultdict(deque)
+		self._running = 0
+		self._running_per_user: Dict[int, int] = defaultdict(int)
+		self._virtual_time = 0.0
+		self._last_finish: Dict[int, float] = {}
+		self._wait_times = deque(maxlen = WAIT_SAMPLES)
+		self._started = 0
+		self._rejected = 0
+
+	@property
+	def queue_depth(self) -> int:
+		return sum(len(queue) for queue in self._waiting.values())
+
+	def _waiting_jobs(self) -> List[Dict[str, Any]]:
+		return sorted((job for queue in self._waiting.values() for job in queue), key = lambda job: job["finish"])
+
+	def queue_position(self, user_id: int) -> int:
+		"""1-based dispatch position of the user's next waiting operation, 0 if none."""
+		for position, job in enumerate(self._waiting_jobs(), start = 1):
+			if job["user_id"] == user_id:
+				return position
+		return 0
+
+	def _enqueue(self, user_id: int, cost: float, weight: float) -> Dict[str, Any]:
+		queue = self._waiting[user_id]
+		if len(queue) >= self.max_queued_per_user:
+			self._rejected += 1
+			raise HTTPException(
+				status_code = 429,
+				detail = {
+					"message": "Too many dataset operations queued. Please retry later.",
+					"queued": len(queue),
+					"queue_position": self.queue_position(user_id),
+					"queue_depth": self.queue_depth
+				},
+				headers = {"Retry-After": "5"}
+			)
+
+		start = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+		job = {
+			"user_id": user_id,
+			"start": start,
+			"finish": start + cost / weight,
+			"enqueued_at": time.monotonic(),
+			"future": asyncio.get_running_loop().create_future()
+		}
+		self._last_finish[user_id] = job["finish"]
+		queue.append(job)
+		return job
+
+	def _remove(self, job: Dict[str, Any]):
+		queue = self._waiting.get(job["user_id"])
+		if queue and job in queue:
+			queue.remove(job)
+			if not queue:
+				del self._waiting[job["user_id"]]
+
+	def _dispatch(self):
+		while self._running < self.max_concurrent:
+			candidates = [
+				queue[0] for user_id, queue in self._waiting.items()
+				if queue and self._running_per_user[user_id] < self.max_per_user
+			]
+			if not candidates:
+				return
+			job = min(candidates, key = lambda candidate: candidate["finish"])
+			self._remove(job)
+			if job["future"].done():
+				# Cancelled while queued, before its task ran to leave the queue
+				continue
+
+			self._virtual_time = max(self._virtual_time, job["start"])
+			self._running += 1
+			self._running_per_user[job["user_id"]] += 1
+			self._started += 1
+			self._wait_times.append(time.monotonic() - job["enqueued_at"])
+			job["future"].set_result(None)
+
+	def _release(self, user_id: int):
+		self._running -= 1
+		self._running_per_user[user_id] -= 1
+		if not self._running_per_user[user_id]:
+			del self._running_per_user[user_id]
+		self._dispatch()
+
+	@asynccontextmanager
+	async def slot(self, user_id: int, cost: float = 1.0, weight: float = 1.0):
+		job = self._enqueue(user_id, cost, weight)
+		self._dispatch()
+		try:
+			await job["future"]
+		except asyncio.CancelledError:
+			# The client went away: give the slot back if it was granted, else leave the queue
+			if job["future"].done() and not job["future"].cancelled():
+				self._release(user_id)
+			else:
+				self._remove(job)
+			raise
+
+		try:
+			yield
+		finally:
+			self._release(user_id)
+
+	def metrics(self) -> Dict[str, Any]:
+		waits = sorted(self._wait_times)
+		return {
+			"max_concurrent": self.max_concurrent,
+			"max_per_user": self.max_per_user,
+			"max_queued_per_user": self.max_queued_per_user,
+			"running": self._running,
+			"queue_depth": self.queue_depth,
+			"users_queued": len(self._waiting),
+			"max_user_queue": max((len(queue) for queue in self._waiting.values()), default = 0),
+			"started": self._started,
+			"rejected": self._rejected,
+			"wait_ms": {
+				"avg": sum(waits) / len(waits) * 1000 if waits else 0.0,
+				"p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+				"max": waits[-1] * 1000 if waits else 0.0
+			}
+		}
+
+
+heavy_scheduler = HeavyOperationScheduler(
+	settings.HEAVY_MAX_CONCURRENT,
+	settings.HEAVY_MAX_PER_USER,
+	settings.HEAVY_MAX_QUEUED_PER_USER
+)
@@ -0,0 +1,23 @@
+# gunicorn.conf.py - run with `gunicorn main:app -c gunicorn.conf.py`
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers inherit it copy-on-write
+preload_app = True
+
+
+def on_starting(server):
+    # Runs in the master after the app is preloaded and before workers fork:
+    # migrate once instead of racing in every worker, and warm the lexicon
+    from core.config import settings
+    from core.startup import init_db, preload_lexicon
+    from database import engine
+
+    init_db()
+    # Pooled connections must not be shared with forked workers
+    engine.dispose()
+    settings.CREATE_TABLES_ON_STARTUP = False
+    preload_lexicon()
@@ -1,16 +1,15 @@
 # main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
 
 from routes.auth import router as auth_router
 from routes.dataset import router as dataset_router  # Note the change
-from database import create_tables
+from routes.health import router as health_router
+from core.startup import lifespan
 
-# Create database tables
-create_tables()
-
-app = FastAPI()
+# Tables are created in the lifespan hook (or by `python manage.py init-db`),
+# not at import time
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +22,9 @@ app.add_middleware(
 #routers
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(dataset_router, prefix="/reviews", tags=["reviews"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import argparse
+
+from core.startup import init_db, preload_lexicon, import_time_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InsightAI backend management commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("init-db", help="Create missing tables and add missing columns.")
+    subparsers.add_parser("preload", help="Load the sentiment lexicon and report how long it takes.")
+    report_parser = subparsers.add_parser("import-report", help="Measure cold import time of heavy modules.")
+    report_parser.add_argument("modules", nargs="*", help="Modules to measure (defaults to the app's heavy modules).")
+    args = parser.parse_args()
+
+    if args.command == "init-db":
+        added = init_db()
+        print("Database schema is up to date.")
+        for column in added:
+            print(f"  added column {column}")
+    elif args.command == "preload":
+        import time
+
+        start = time.perf_counter()
+        preload_lexicon()
+        print(f"Sentiment lexicon loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    elif args.command == "import-report":
+        report = import_time_report(args.modules) if args.modules else import_time_report()
+        for module, elapsed in sorted(report.items(), key=lambda item: -(item[1] or 0)):
+            print(f"{module:<32} {'failed' if elapsed is None else f'{elapsed:8.1f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
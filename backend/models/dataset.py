@@ -12,8 +12,11 @@ class Dataset(Base):
 	name = Column(String, nullable = False)
 	description = Column(String)
 	file_data = Column(LargeBinary)
-	file_type = Column(String)  # 'csv' or 'json'
+	file_type = Column(String)  # 'csv', 'json' or 'jsonl'
+	file_codec = Column(String)  # Codec of file_data at rest, NULL for legacy uncompressed rows
+	raw_size = Column(Integer)  # Uncompressed size of file_data in bytes
 	columns = Column(JSON)
+	column_types = Column(JSON)  # pandas dtype per column from the upload parse, NULL for legacy rows
 	row_count = Column(Integer)
 	created_at = Column(DateTime, default = datetime.utcnow)
 
@@ -21,6 +24,15 @@ class Dataset(Base):
 	analysis_results = relationship("SentimentAnalysis", back_populates = "dataset")
 
 
+class DatasetRowBlock(Base):
+	__tablename__ = "dataset_row_blocks"
+
+	id = Column(Integer, primary_key = True, index = True)
+	dataset_id = Column(Integer, ForeignKey("datasets.id"), index = True)
+	block = Column(Integer)  # Holds rows block * ROW_BLOCK_SIZE up to the next block
+	data = Column(LargeBinary)  # zlib-compressed JSON array of row records
+
+
 class SentimentAnalysis(Base):
 	__tablename__ = "sentiment_analyses"
 
@@ -30,4 +42,35 @@ class SentimentAnalysis(Base):
 	results = Column(JSON)  # Stores the sentiment analysis results
 	created_at = Column(DateTime, default = datetime.utcnow)
 
-	dataset = relationship("Dataset", back_populates = "analysis_results")
\ No newline at end of file
+	dataset = relationship("Dataset", back_populates = "analysis_results")
+	rollups = relationship("SentimentRollup", back_populates = "analysis")
+	search_index = relationship("SearchIndex", back_populates = "analysis", uselist = False)
+
+
+class SentimentRollup(Base):
+	__tablename__ = "sentiment_rollups"
+
+	id = Column(Integer, primary_key = True, index = True)
+	analysis_id = Column(Integer, ForeignKey("sentiment_analyses.id"), index = True)
+	query_key = Column(String, index = True)  # Canonical JSON of group_by/date_column/bucket
+	group_by = Column(JSON)
+	date_column = Column(String)
+	bucket = Column(String)
+	rows = Column(JSON)  # Grouped counts and mean polarity
+	created_at = Column(DateTime, default = datetime.utcnow)
+
+	analysis = relationship("SentimentAnalysis", back_populates = "rollups")
+
+
+class SearchIndex(Base):
+	__tablename__ = "search_indexes"
+
+	id = Column(Integer, primary_key = True, index = True)
+	analysis_id = Column(Integer, ForeignKey("sentiment_analyses.id"), unique = True, index = True)
+	dataset_id = Column(Integer, ForeignKey("datasets.id"), index = True)
+	text_column = Column(String)
+	row_count = Column(Integer)
+	data = Column(LargeBinary)  # Compressed token postings plus per-row polarity/category
+	created_at = Column(DateTime, default = datetime.utcnow)
+
+	analysis = relationship("SentimentAnalysis", back_populates = "search_index")
\ No newline at end of file
@@ -4,6 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import secrets
 from core.security import verify_password, hash_password, create_access_token, get_current_user
+from core.cache import response_cache
 
 from database import get_db
 from models.user import User
@@ -135,6 +136,8 @@ def delete_account(
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
+	user_id = current_user.id
 	db.delete(current_user)
 	db.commit()
+	response_cache.invalidate(user_id)
 	return {"message": "Account deleted successfully"}
\ No newline at end of file
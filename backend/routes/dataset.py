@@ -1,68 +1,94 @@
-from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
+from typing import List, Dict, Optional, BinaryIO, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import json
+import zipfile
 
 from database import get_db
-from models.dataset import Dataset, SentimentAnalysis
-from schemas.dataset import DatasetResponse, AnalysisResponse
-from services.dataset_service import DatasetService
+from models.dataset import Dataset, DatasetRowBlock, SentimentAnalysis, SentimentRollup, SearchIndex
+from schemas.dataset import DatasetResponse, AnalysisResponse, RollupResponse, SearchResponse
+from services.dataset_service import DatasetService, ROLLUP_BUCKETS, ROLLUP_VERSION, ROW_BLOCK_SIZE, SENTIMENT_CATEGORIES
+from services.search_service import SearchService
+from services.export_service import ExportService, EXPORT_FORMATS
+from services import compression
 from models.user import User
 from core.security import get_current_user
+from core.config import settings
+from core.cache import response_cache, make_etag, cached_json_response
+from core.scheduler import heavy_scheduler, analysis_cost, upload_cost
 
 router = APIRouter()
 dataset_service = DatasetService()
-
-
-@router.post("/dataset")
-async def upload_dataset(
-	file: UploadFile = File(...),
-	name: str = Form(...),
-	description: str = Form(None),
-	current_user: User = Depends(get_current_user),
-	db: Session = Depends(get_db)
-):
-	# Validate file type
-	file_type = file.filename.split('.')[-1].lower()
-	if file_type not in ['csv', 'json']:
-		raise HTTPException(
-			status_code = 400,
-			detail = "Invalid file type. Please upload a CSV or JSON file."
-		)
-
-	file_data = await file.read()
-
+search_service = SearchService()
+export_service = ExportService()
+
+
+def _new_dataset(
+	user_id: int,
+	name: str,
+	description: Optional[str],
+	file_type: str,
+	storage_codec: str,
+	profile: Dict
+) -> Dataset:
+	return Dataset(
+		user_id = user_id,
+		name = name,
+		description = description,
+		file_data = profile["stored_data"],
+		file_type = file_type,
+		file_codec = storage_codec,
+		raw_size = profile["raw_size"],
+		columns = profile["columns"],
+		column_types = profile["column_types"],
+		row_count = profile["row_count"]
+	)
+
+
+def _store_upload(
+	db: Session,
+	user_id: int,
+	name: str,
+	description: Optional[str],
+	file_data: bytes,
+	file_type: str
+) -> Dict:
 	try:
-		# Read the file and validate
-		df = dataset_service.read_file(file_data, file_type)
-		if df.empty:
+		# Read the file, detect text columns and compress the dataset at rest
+		storage_codec = settings.DATASET_STORAGE_CODEC
+		profile = dataset_service.profile_file(file_data, file_type, storage_codec)
+		if profile["row_count"] == 0:
 			raise HTTPException(
 				status_code = 400,
 				detail = "Uploaded file is empty."
 			)
 
-		# Detect text columns
-		text_columns = dataset_service.detect_text_columns(df)
-
 		# Create dataset record
-		dataset = Dataset(
-			user_id = current_user.id,
-			name = name,
-			description = description,
-			file_data = file_data,
-			file_type = file_type,
-			columns = json.dumps(df.columns.tolist()),
-			row_count = len(df)
-		)
+		dataset = _new_dataset(user_id, name, description, file_type, storage_codec, profile)
 		db.add(dataset)
 		db.commit()
 		db.refresh(dataset)
+		response_cache.invalidate(user_id)
 
+		stored_bytes = len(profile["stored_data"])
 		return {
 			"message": "Dataset uploaded successfully",
 			"dataset_id": dataset.id,
-			"text_columns": text_columns
+			"text_columns": profile["text_columns"],
+			"storage": {
+				"codec": storage_codec,
+				"raw_bytes": profile["raw_size"],
+				"stored_bytes": stored_bytes,
+				"saved_bytes": profile["raw_size"] - stored_bytes
+			}
 		}
+	except HTTPException:
+		raise
 	except Exception as e:
 		raise HTTPException(
 			status_code = 500,
@@ -70,99 +96,345 @@ async def upload_dataset(
 		)
 
 
+@router.post("/dataset")
+async def upload_dataset(
+	file: UploadFile = File(...),
+	name: str = Form(...),
+	description: str = Form(None),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	# Validate file type and compression
+	try:
+		file_type, upload_codec = compression.detect_upload_format(file.filename)
+	except ValueError as e:
+		raise HTTPException(status_code = 400, detail = str(e))
+
+	# Charge the scheduler for the decompressed size, not the compressed upload
+	size = file.size or 0
+	if upload_codec != "none":
+		size = compression.estimate_decompressed_size(file.file, upload_codec, size)
+
+	# Wait for a fair share of the heavy-operation slots (429 if this user's queue is full)
+	async with heavy_scheduler.slot(current_user.id, upload_cost(size)):
+		# Decompress while reading so the compressed upload is never held in full
+		try:
+			decompressor = compression.StreamDecompressor(upload_codec, settings.UPLOAD_MAX_BYTES)
+			buffer = bytearray()
+			while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+				buffer += decompressor.decompress(chunk)
+			buffer += decompressor.flush()
+			file_data = bytes(buffer)
+		except compression.DecompressedSizeError as e:
+			raise HTTPException(status_code = 413, detail = str(e))
+		except Exception as e:
+			raise HTTPException(
+				status_code = 400,
+				detail = f"Could not decompress the uploaded file: {str(e)}"
+			)
+
+		# Parse and store off the event loop
+		return await run_in_threadpool(
+			_store_upload,
+			db,
+			current_user.id,
+			name,
+			description,
+			file_data,
+			file_type
+		)
+
+
+def _profile_member(file_data: bytes, file_type: str, upload_codec: str, storage_codec: str) -> Dict:
+	"""Parse and profile one archive member; runs in the bulk upload worker pool."""
+	# The size limit also applies after decompression, so a small .gz member cannot expand unbounded
+	file_data = compression.decompress(file_data, upload_codec, settings.BULK_MAX_MEMBER_BYTES)
+	profile = dataset_service.profile_file(file_data, file_type, storage_codec)
+	if profile["row_count"] == 0:
+		raise ValueError("File is empty.")
+	return profile
+
+
+def _ingest_archive(
+	db: Session,
+	user_id: int,
+	archive_file: BinaryIO,
+	name_prefix: str,
+	description: Optional[str]
+) -> Dict:
+	storage_codec = settings.DATASET_STORAGE_CODEC
+	results = []
+	pending = deque()  # (result, future) in archive order, bounded to keep memory flat
+	batch = []  # (result, dataset) waiting to be inserted
+	batch_bytes = 0  # stored bytes held by `batch`
+
+	def insert_batch():
+		nonlocal batch_bytes
+		# One transaction per batch; flush assigns ids before the commit expires the rows
+		try:
+			db.add_all([dataset for _, dataset in batch])
+			db.flush()
+			dataset_ids = [dataset.id for _, dataset in batch]
+			db.commit()
+		except Exception as e:
+			db.rollback()
+			for result, _ in batch:
+				result["error"] = f"Could not store dataset: {str(e)}"
+		else:
+			for (result, _), dataset_id in zip(batch, dataset_ids):
+				result["dataset_id"] = dataset_id
+		batch.clear()
+		batch_bytes = 0
+
+	def collect(result, future):
+		nonlocal batch_bytes
+		try:
+			profile = future.result()
+		except Exception as e:
+			result["error"] = str(e)
+			return
+		result["row_count"] = profile["row_count"]
+		result["text_columns"] = profile["text_columns"]
+		batch.append((result, _new_dataset(
+			user_id,
+			result["name"],
+			description,
+			result["file_type"],
+			storage_codec,
+			profile
+		)))
+		batch_bytes += len(profile["stored_data"])
+		# Flush on rows or bytes so a batch of large shards does not pile up in memory
+		if len(batch) >= settings.BULK_INSERT_BATCH or batch_bytes >= settings.BULK_INSERT_BATCH_BYTES:
+			insert_batch()
+
+	with zipfile.ZipFile(archive_file) as archive, \
+		ThreadPoolExecutor(max_workers = settings.BULK_PARSE_WORKERS) as executor:
+		for member in archive.infolist():
+			base_name = member.filename.rsplit('/', 1)[-1]
+			if member.is_dir() or not base_name or base_name.startswith('.') or member.filename.startswith('__MACOSX/'):
+				continue
+
+			result = {
+				"member": member.filename,
+				"name": None,
+				"file_type": None,
+				"dataset_id": None,
+				"row_count": None,
+				"text_columns": [],
+				"error": None
+			}
+			results.append(result)
+			try:
+				file_type, upload_codec = compression.detect_upload_format(base_name)
+				if member.file_size > settings.BULK_MAX_MEMBER_BYTES:
+					raise ValueError(f"File exceeds the {settings.BULK_MAX_MEMBER_BYTES} byte limit.")
+				# Members are read one at a time, only the bounded pending set is held in memory
+				file_data = archive.read(member)
+			except Exception as e:
+				result["error"] = str(e)
+				continue
+
+			result["file_type"] = file_type
+			stem = base_name.rsplit('.', 1 if upload_codec == "none" else 2)[0]
+			result["name"] = f"{name_prefix}{stem}"
+			pending.append((result, executor.submit(
+				_profile_member, file_data, file_type, upload_codec, storage_codec
+			)))
+
+			if len(pending) >= 2 * settings.BULK_PARSE_WORKERS:
+				collect(*pending.popleft())
+
+		while pending:
+			collect(*pending.popleft())
+
+	if batch:
+		insert_batch()
+	response_cache.invalidate(user_id)
+
+	created = sum(1 for result in results if result["dataset_id"] is not None)
+	return {
+		"message": "Archive processed",
+		"created": created,
+		"failed": len(results) - created,
+		"results": results
+	}
+
+
+@router.post("/datasets/bulk")
+async def bulk_upload_datasets(
+	file: UploadFile = File(...),
+	name_prefix: str = Form(""),
+	description: str = Form(None),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	if not file.filename.lower().endswith('.zip') or not zipfile.is_zipfile(file.file):
+		raise HTTPException(
+			status_code = 400,
+			detail = "Invalid archive. Please upload a ZIP file of CSV/JSON/JSON Lines files."
+		)
+
+	# The whole archive counts as one heavy operation, charged for its uncompressed size
+	try:
+		with zipfile.ZipFile(file.file) as archive:
+			size = sum(member.file_size for member in archive.infolist())
+	except zipfile.BadZipFile as e:
+		raise HTTPException(status_code = 400, detail = f"Invalid archive: {str(e)}")
+	file.file.seek(0)
+
+	async with heavy_scheduler.slot(current_user.id, upload_cost(size)):
+		try:
+			return await run_in_threadpool(
+				_ingest_archive,
+				db,
+				current_user.id,
+				file.file,
+				name_prefix,
+				description
+			)
+		except zipfile.BadZipFile as e:
+			raise HTTPException(status_code = 400, detail = f"Invalid archive: {str(e)}")
+
+
 @router.get("/datasets", response_model = List[DatasetResponse])
 async def get_datasets(
+	request: Request,
 	skip: int = Query(0, ge = 0),
 	limit: int = Query(10, ge = 1, le = 100),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
-	datasets = db.query(Dataset) \
+	# Datasets are immutable, so count and newest id identify the listing's version
+	count, max_id = db.query(func.count(Dataset.id), func.max(Dataset.id)) \
 		.filter(Dataset.user_id == current_user.id) \
-		.offset(skip) \
-		.limit(limit) \
-		.all()
-	return datasets
+		.one()
+	etag = make_etag("datasets", current_user.id, count, max_id, skip, limit)
+
+	def build():
+		datasets = db.query(Dataset) \
+			.options(defer(Dataset.file_data)) \
+			.filter(Dataset.user_id == current_user.id) \
+			.offset(skip) \
+			.limit(limit) \
+			.all()
+		return [DatasetResponse.model_validate(dataset) for dataset in datasets]
+
+	return cached_json_response(request, current_user.id, etag, build)
 
 
 @router.get("/dataset/{dataset_id}", response_model = DatasetResponse)
 async def get_dataset(
+	request: Request,
 	dataset_id: int,
 	preview: bool = Query(False),
 	preview_rows: int = Query(5, ge = 1, le = 100),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
+	# Defer the file blob, it is only needed when a preview has to be built
 	dataset = db.query(Dataset) \
+		.options(defer(Dataset.file_data)) \
 		.filter(Dataset.id == dataset_id, Dataset.user_id == current_user.id) \
 		.first()
 
 	if not dataset:
 		raise HTTPException(status_code = 404, detail = "Dataset not found")
 
-	response = DatasetResponse.from_orm(dataset)
+	etag = make_etag("dataset", dataset.id, dataset.created_at, preview, preview_rows)
 
-	if preview:
-		df = dataset_service.read_file(dataset.file_data, dataset.file_type)
-		response.preview = dataset_service.get_dataset_preview(df, preview_rows)
+	def build():
+		response = DatasetResponse.model_validate(dataset)
 
-	return response
+		if preview:
+			df = dataset_service.read_dataset(dataset, nrows = preview_rows)
+			response.preview = dataset_service.get_dataset_preview(df, preview_rows)
 
-@router.post("/dataset/{dataset_id}/analyze")
-async def analyze_dataset(
-	dataset_id: int,
-	text_column: str,
-	current_user: User = Depends(get_current_user),
-	db: Session = Depends(get_db)
-):
-	# Fetch dataset
-	dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
-	if not dataset:
-		raise HTTPException(status_code = 404, detail = "Dataset not found")
+		return response
 
-	try:
-		# Read the dataset
-		df = dataset_service.read_file(dataset.file_data, dataset.file_type)
+	return cached_json_response(request, current_user.id, etag, build)
 
-		if text_column not in df.columns:
-			raise HTTPException(
-				status_code = 400,
-				detail = f"Column '{text_column}' not found in dataset"
-			)
 
-		# Perform sentiment analysis
-		results = []
-		for text in df[text_column].fillna(""):
-			sentiment = dataset_service.analyze_sentiment(text)
-			category = dataset_service.categorize_sentiment(sentiment["polarity"])
-			results.append({
-				"text": text[:100],  # Store preview of text
-				"sentiment": sentiment,
-				"category": category
-			})
+def _run_analysis(
+	db: Session,
+	user_id: int,
+	datasets: List[Dataset],
+	text_columns: List[str]
+) -> Dict:
+	try:
+		# One memo shared by every dataset and column, so repeated texts are scored once
+		memo = {}
+		analyses = []
+		for dataset in datasets:
+			# Read each dataset once, whatever the number of columns
+			df = dataset_service.read_dataset(dataset)
+
+			missing_columns = [column for column in text_columns if column not in df.columns]
+			if missing_columns:
+				raise HTTPException(
+					status_code = 400,
+					detail = f"Column(s) {', '.join(missing_columns)} not found in dataset {dataset.id}"
+				)
+
+			# Keep the parsed rows in blocks so search pages never re-read the file
+			if not db.query(DatasetRowBlock.id).filter(DatasetRowBlock.dataset_id == dataset.id).first():
+				db.add_all(
+					DatasetRowBlock(dataset_id = dataset.id, block = block, data = data)
+					for block, data in dataset_service.encode_row_blocks(df)
+				)
+
+			# Perform sentiment analysis
+			column_results = dataset_service.analyze_columns(df, text_columns, memo)
+
+			for column, results in column_results.items():
+				# Store analysis results
+				analysis = SentimentAnalysis(
+					dataset_id = dataset.id,
+					text_column = column,
+					results = results
+				)
+				db.add(analysis)
+				db.flush()
+
+				# Build the keyword index over the full (untruncated) text
+				db.add(SearchIndex(
+					analysis_id = analysis.id,
+					dataset_id = dataset.id,
+					text_column = column,
+					row_count = len(results),
+					data = search_service.build_index(df[column].fillna(""), results)
+				))
+				analyses.append((analysis, results))
 
-		# Store analysis results
-		analysis = SentimentAnalysis(
-			dataset_id = dataset_id,
-			text_column = text_column,
-			results = results
-		)
-		db.add(analysis)
 		db.commit()
+		response_cache.invalidate(user_id)
 
 		# Calculate summary statistics
-		sentiment_counts = {}
-		for result in results:
-			category = result["category"]
-			sentiment_counts[category] = sentiment_counts.get(category, 0) + 1
+		summaries = []
+		combined_counts = {}
+		for analysis, results in analyses:
+			sentiment_counts = dataset_service.count_sentiments(results)
+			for category, count in sentiment_counts.items():
+				combined_counts[category] = combined_counts.get(category, 0) + count
+			summaries.append({
+				"analysis_id": analysis.id,
+				"dataset_id": analysis.dataset_id,
+				"text_column": analysis.text_column,
+				"row_count": len(results),
+				"sentiment_counts": sentiment_counts
+			})
 
+		first_analysis, first_results = analyses[0]
 		return {
 			"message": "Sentiment analysis completed",
-			"analysis_id": analysis.id,
-			"sentiment_counts": sentiment_counts,
-			"sample_results": results[:5]  # Return first 5 results as sample
+			"analysis_id": first_analysis.id,
+			"sentiment_counts": combined_counts,
+			"sample_results": first_results[:5],  # Return first 5 results as sample
+			"analyses": summaries
 		}
 
+	except HTTPException:
+		raise
 	except Exception as e:
 		raise HTTPException(
 			status_code = 500,
@@ -170,8 +442,47 @@ async def analyze_dataset(
 		)
 
 
+@router.post("/dataset/{dataset_id}/analyze")
+async def analyze_dataset(
+	dataset_id: int,
+	text_column: List[str] = Query(...),
+	dataset_ids: List[int] = Query([]),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	# Analyze the path dataset first, then any additional datasets in request order
+	requested_ids = list(dict.fromkeys([dataset_id] + dataset_ids))
+	text_columns = list(dict.fromkeys(text_column))
+
+	# Fetch datasets; ids the user does not own are reported as not found. The file
+	# blobs are deferred so queued requests do not hold them while they wait
+	datasets = {
+		dataset.id: dataset
+		for dataset in db.query(Dataset)
+		.options(defer(Dataset.file_data))
+		.filter(Dataset.id.in_(requested_ids), Dataset.user_id == current_user.id)
+		.all()
+	}
+	missing = [str(requested_id) for requested_id in requested_ids if requested_id not in datasets]
+	if missing:
+		raise HTTPException(status_code = 404, detail = f"Dataset not found: {', '.join(missing)}")
+
+	# Wait for a fair share of the heavy-operation slots (429 if this user's queue is full)
+	rows = sum(dataset.row_count or 0 for dataset in datasets.values()) * len(text_columns)
+	async with heavy_scheduler.slot(current_user.id, analysis_cost(rows)):
+		# Score off the event loop
+		return await run_in_threadpool(
+			_run_analysis,
+			db,
+			current_user.id,
+			[datasets[requested_id] for requested_id in requested_ids],
+			text_columns
+		)
+
+
 @router.get("/dataset/{dataset_id}/analyses", response_model = List[AnalysisResponse])
 async def get_dataset_analyses(
+	request: Request,
 	dataset_id: int,
 	skip: int = Query(0, ge = 0),
 	limit: int = Query(10, ge = 1, le = 100),
@@ -179,38 +490,47 @@ async def get_dataset_analyses(
 	db: Session = Depends(get_db)
 ):
 	dataset = db.query(Dataset) \
+		.options(defer(Dataset.file_data)) \
 		.filter(Dataset.id == dataset_id, Dataset.user_id == current_user.id) \
 		.first()
 
 	if not dataset:
 		raise HTTPException(status_code = 404, detail = "Dataset not found")
 
-	analyses = db.query(SentimentAnalysis) \
+	# Finished analyses never change, so count and newest id identify the listing's version
+	count, max_id = db.query(func.count(SentimentAnalysis.id), func.max(SentimentAnalysis.id)) \
 		.filter(SentimentAnalysis.dataset_id == dataset_id) \
-		.offset(skip) \
-		.limit(limit) \
-		.all()
+		.one()
+	etag = make_etag("analyses", dataset_id, count, max_id, skip, limit)
 
-	# Add sentiment counts to each analysis response
-	for analysis in analyses:
-		results = analysis.results
-		sentiment_counts = {}
-		for result in results:
-			category = result["category"]
-			sentiment_counts[category] = sentiment_counts.get(category, 0) + 1
-		analysis.sentiment_counts = sentiment_counts
-		analysis.sample_results = results[:5]  # Include first 5 results as sample
+	def build():
+		analyses = db.query(SentimentAnalysis) \
+			.filter(SentimentAnalysis.dataset_id == dataset_id) \
+			.offset(skip) \
+			.limit(limit) \
+			.all()
 
-	return analyses
+		# Add sentiment counts to each analysis response
+		for analysis in analyses:
+			results = analysis.results
+			analysis.sentiment_counts = dataset_service.count_sentiments(results)
+			analysis.sample_results = results[:5]  # Include first 5 results as sample
+
+		return [AnalysisResponse.model_validate(analysis) for analysis in analyses]
+
+	return cached_json_response(request, current_user.id, etag, build)
 
 
 @router.get("/analysis/{analysis_id}", response_model = AnalysisResponse)
 async def get_analysis(
+	request: Request,
 	analysis_id: int,
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
+	# Defer the results, they are only loaded when the response has to be built
 	analysis = db.query(SentimentAnalysis) \
+		.options(defer(SentimentAnalysis.results)) \
 		.join(Dataset) \
 		.filter(
 		SentimentAnalysis.id == analysis_id,
@@ -220,14 +540,319 @@ async def get_analysis(
 	if not analysis:
 		raise HTTPException(status_code = 404, detail = "Analysis not found")
 
-	# Calculate sentiment counts
-	results = analysis.results
-	sentiment_counts = {}
-	for result in results:
-		category = result["category"]
-		sentiment_counts[category] = sentiment_counts.get(category, 0) + 1
+	etag = make_etag("analysis", analysis.id, analysis.created_at)
+
+	def build():
+		# Calculate sentiment counts
+		results = analysis.results
+		analysis.sentiment_counts = dataset_service.count_sentiments(results)
+		analysis.sample_results = results[:5]  # Include first 5 results as sample
+
+		return AnalysisResponse.model_validate(analysis)
 
-	analysis.sentiment_counts = sentiment_counts
-	analysis.sample_results = results[:5]  # Include first 5 results as sample
+	return cached_json_response(request, current_user.id, etag, build)
 
-	return analysis
\ No newline at end of file
+
+def _build_rollup(
+	db: Session,
+	analysis: SentimentAnalysis,
+	dataset: Dataset,
+	query_key: str,
+	group_by: List[str],
+	date_column: Optional[str],
+	bucket: str
+) -> SentimentRollup:
+	# Another request may have materialized the same rollup while this one was queued
+	rollup = db.query(SentimentRollup) \
+		.filter(SentimentRollup.analysis_id == analysis.id, SentimentRollup.query_key == query_key) \
+		.first()
+	if rollup:
+		return rollup
+
+	df = dataset_service.read_dataset(dataset)
+
+	missing = [column for column in group_by + ([date_column] if date_column else []) if column not in df.columns]
+	if missing:
+		raise HTTPException(
+			status_code = 400,
+			detail = f"Column(s) not found in dataset: {', '.join(missing)}"
+		)
+
+	try:
+		rows = dataset_service.compute_rollup(
+			df,
+			analysis.results,
+			group_by,
+			date_column = date_column,
+			bucket = bucket
+		)
+	except Exception as e:
+		raise HTTPException(
+			status_code = 500,
+			detail = f"An error occurred while computing the rollup: {str(e)}"
+		)
+
+	rollup = SentimentRollup(
+		analysis_id = analysis.id,
+		query_key = query_key,
+		group_by = group_by,
+		date_column = date_column,
+		bucket = bucket if date_column else None,
+		rows = rows
+	)
+	db.add(rollup)
+	db.commit()
+	db.refresh(rollup)
+
+	return rollup
+
+
+@router.get("/analysis/{analysis_id}/rollup", response_model = RollupResponse)
+async def get_analysis_rollup(
+	analysis_id: int,
+	group_by: List[str] = Query([]),
+	date_column: Optional[str] = Query(None),
+	bucket: str = Query("week"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	if not group_by and not date_column:
+		raise HTTPException(
+			status_code = 400,
+			detail = "Provide at least one group_by column or a date_column"
+		)
+
+	if bucket not in ROLLUP_BUCKETS:
+		raise HTTPException(
+			status_code = 400,
+			detail = f"Invalid bucket. Choose one of: {', '.join(ROLLUP_BUCKETS)}"
+		)
+
+	# A repeated column would make pandas group by a 2-D key
+	group_by = list(dict.fromkeys(group_by))
+
+	# Results and the file blob are deferred until the rollup actually has to be computed
+	analysis = db.query(SentimentAnalysis) \
+		.options(defer(SentimentAnalysis.results)) \
+		.join(Dataset) \
+		.filter(
+		SentimentAnalysis.id == analysis_id,
+		Dataset.user_id == current_user.id
+	).first()
+
+	if not analysis:
+		raise HTTPException(status_code = 404, detail = "Analysis not found")
+
+	# Serve repeated queries from the materialized rollup
+	query_key = json.dumps({
+		"version": ROLLUP_VERSION,
+		"group_by": group_by,
+		"date_column": date_column,
+		"bucket": bucket if date_column else None
+	}, sort_keys = True)
+	rollup = db.query(SentimentRollup) \
+		.filter(SentimentRollup.analysis_id == analysis_id, SentimentRollup.query_key == query_key) \
+		.first()
+	if rollup:
+		return rollup
+
+	dataset = db.query(Dataset) \
+		.options(defer(Dataset.file_data)) \
+		.filter(Dataset.id == analysis.dataset_id) \
+		.one()
+
+	# Parsing the dataset dominates the cost; wait for a fair share of the heavy-operation slots
+	async with heavy_scheduler.slot(current_user.id, upload_cost(dataset.raw_size or 0)):
+		return await run_in_threadpool(
+			_build_rollup,
+			db,
+			analysis,
+			dataset,
+			query_key,
+			group_by,
+			date_column,
+			bucket
+		)
+
+
+def _read_page(db: Session, dataset: Dataset, row_ids: List[int]) -> Dict[int, Dict]:
+	"""Full rows for a search page, keyed by row id."""
+	blocks = {row_id // ROW_BLOCK_SIZE for row_id in row_ids}
+	stored = dict(
+		db.query(DatasetRowBlock.block, DatasetRowBlock.data)
+		.filter(DatasetRowBlock.dataset_id == dataset.id, DatasetRowBlock.block.in_(blocks))
+		.all()
+	)
+	if blocks <= stored.keys():
+		return dataset_service.decode_rows(stored, row_ids)
+
+	# Datasets analyzed before row blocks were stored are read from the file
+	rows = dataset_service.read_rows(dataset, row_ids)
+	records = json.loads(rows.to_json(orient = 'records', date_format = 'iso'))
+	return dict(zip(rows.index.tolist(), records))
+
+
+@router.get("/dataset/{dataset_id}/search", response_model = SearchResponse)
+async def search_dataset(
+	dataset_id: int,
+	q: Optional[str] = Query(None),
+	text_column: Optional[str] = Query(None),
+	category: List[str] = Query([]),
+	min_polarity: Optional[float] = Query(None, ge = -1, le = 1),
+	max_polarity: Optional[float] = Query(None, ge = -1, le = 1),
+	skip: int = Query(0, ge = 0),
+	limit: int = Query(10, ge = 1, le = 100),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	invalid = [value for value in category if value not in SENTIMENT_CATEGORIES]
+	if invalid:
+		raise HTTPException(
+			status_code = 400,
+			detail = f"Invalid category: {', '.join(invalid)}"
+		)
+
+	dataset = db.query(Dataset) \
+		.options(defer(Dataset.file_data)) \
+		.filter(Dataset.id == dataset_id, Dataset.user_id == current_user.id) \
+		.first()
+
+	if not dataset:
+		raise HTTPException(status_code = 404, detail = "Dataset not found")
+
+	# Searching one column when several are indexed would silently miss matches
+	if not text_column:
+		indexed_columns = [
+			column for (column,) in db.query(SearchIndex.text_column)
+			.filter(SearchIndex.dataset_id == dataset_id)
+			.distinct()
+			.order_by(SearchIndex.text_column)
+		]
+		if len(indexed_columns) > 1:
+			raise HTTPException(
+				status_code = 400,
+				detail = f"Several columns are indexed, choose a text_column: {', '.join(indexed_columns)}"
+			)
+
+	# Use the most recent index for the dataset and column; the blob is
+	# deferred and only loaded when the decoded index is not cached
+	query = db.query(SearchIndex) \
+		.options(defer(SearchIndex.data)) \
+		.filter(SearchIndex.dataset_id == dataset_id)
+	if text_column:
+		query = query.filter(SearchIndex.text_column == text_column)
+	index_record = query.order_by(SearchIndex.id.desc()).first()
+
+	if not index_record:
+		raise HTTPException(status_code = 404, detail = "No analyzed text found for this dataset")
+
+	index = search_service.get_index(index_record.id, lambda: index_record.data)
+	row_ids = search_service.search(
+		index,
+		query = q,
+		categories = category,
+		min_polarity = min_polarity,
+		max_polarity = max_polarity
+	)
+
+	# Full rows for the page come from the stored row blocks, scores from the index
+	page = row_ids[skip:skip + limit]
+	rows = _read_page(db, dataset, page)
+
+	results = []
+	for row_id in page:
+		record = rows[row_id]
+		results.append({
+			"row_id": row_id,
+			"text": record.get(index_record.text_column),
+			**search_service.scores(index, row_id),
+			"row": record
+		})
+
+	return {
+		"analysis_id": index_record.analysis_id,
+		"text_column": index_record.text_column,
+		"total": len(row_ids),
+		"skip": skip,
+		"limit": limit,
+		"results": results
+	}
+
+
+def _stream_export(bind, dataset: Dataset, analysis_id: int, index_id: Optional[int], export_format: str) -> Iterator[bytes]:
+	"""Load the file and scores once streaming starts, in the threadpool rather than on the event loop."""
+	# The request session is closed before the body streams, so use a session of our own
+	with Session(bind) as db:
+		file_data = db.query(Dataset.file_data).filter(Dataset.id == dataset.id).scalar()
+		scores = None
+		if index_id is not None:
+			scores = search_service.get_index(
+				index_id,
+				lambda: db.query(SearchIndex.data).filter(SearchIndex.id == index_id).scalar()
+			)
+		# Analyses without an index, or whose index predates stored subjectivity, use the results
+		if scores is None or not scores["subjectivity"]:
+			results = db.query(SentimentAnalysis.results).filter(SentimentAnalysis.id == analysis_id).scalar()
+			scores = export_service.scores_from_results(results)
+
+	yield from export_service.iter_export(
+		file_data,
+		dataset.file_type,
+		dataset.file_codec,
+		scores,
+		export_format,
+		dataset.column_types
+	)
+
+
+@router.get("/analysis/{analysis_id}/export")
+async def export_analysis(
+	analysis_id: int,
+	format: str = Query("csv"),
+	compress: bool = Query(False, alias = "gzip"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	if format not in EXPORT_FORMATS:
+		raise HTTPException(
+			status_code = 400,
+			detail = f"Invalid export format. Choose one of: {', '.join(EXPORT_FORMATS)}"
+		)
+
+	if format == "parquet":
+		try:
+			import pyarrow  # noqa: F401
+		except ImportError:
+			raise HTTPException(status_code = 400, detail = "Parquet export requires pyarrow to be installed")
+
+	# Only look up ids here; the results and blobs are loaded by the stream itself
+	analysis = db.query(SentimentAnalysis) \
+		.options(defer(SentimentAnalysis.results)) \
+		.join(Dataset) \
+		.filter(
+		SentimentAnalysis.id == analysis_id,
+		Dataset.user_id == current_user.id
+	).first()
+
+	if not analysis:
+		raise HTTPException(status_code = 404, detail = "Analysis not found")
+
+	dataset = db.query(Dataset) \
+		.options(defer(Dataset.file_data)) \
+		.filter(Dataset.id == analysis.dataset_id) \
+		.one()
+	index_id = db.query(SearchIndex.id).filter(SearchIndex.analysis_id == analysis_id).scalar()
+	chunks = _stream_export(db.get_bind(), dataset, analysis_id, index_id, format)
+
+	extension, media_type = EXPORT_FORMATS[format]
+	filename = f"analysis_{analysis_id}.{extension}"
+	if compress:
+		chunks = export_service.gzip_stream(chunks)
+		filename += ".gz"
+		media_type = "application/gzip"
+
+	return StreamingResponse(
+		chunks,
+		media_type = media_type,
+		headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+	)
\ No newline at end of file
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.startup import state
+from core.scheduler import heavy_scheduler
+from database import get_db
+
+router = APIRouter()
+
+
+@router.get("/live")
+def liveness():
+	return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness(db: Session = Depends(get_db)):
+	checks = {}
+	try:
+		db.execute(text("SELECT 1"))
+		checks["database"] = True
+	except Exception:
+		checks["database"] = False
+	# Tables are created by `manage.py init-db` (or on startup), not by every worker
+	try:
+		checks["schema"] = inspect(db.get_bind()).has_table("datasets")
+	except Exception:
+		checks["schema"] = False
+	checks["lexicon"] = state["lexicon_loaded"] or not settings.PRELOAD_LEXICON
+
+	ready = all(checks.values())
+	return JSONResponse(
+		status_code = 200 if ready else 503,
+		content = {"status": "ready" if ready else "not_ready", "checks": checks}
+	)
+
+
+
+@router.get("/scheduler")
+def scheduler_metrics():
+	return heavy_scheduler.metrics()
\ No newline at end of file
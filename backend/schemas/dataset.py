@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+import json
+
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -16,9 +18,16 @@ class DatasetResponse(DatasetBase):
     columns: List[str]
     row_count: int
     created_at: datetime
+    preview: Optional[List[Dict[str, Any]]] = None
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+    @field_validator("columns", mode="before")
+    @classmethod
+    def decode_columns(cls, value):
+        # Older rows stored the column list as a JSON-encoded string, some with integer names
+        if isinstance(value, str):
+            value = json.loads(value)
+        return [str(column) for column in value] if isinstance(value, list) else value
 
 class AnalysisResponse(BaseModel):
     id: int
@@ -27,6 +36,22 @@ class AnalysisResponse(BaseModel):
     created_at: datetime
     sentiment_counts: Dict[str, int]
     sample_results: List[Dict[str, Any]]
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+class RollupResponse(BaseModel):
+    id: int
+    analysis_id: int
+    group_by: List[str]
+    date_column: Optional[str] = None
+    bucket: Optional[str] = None
+    rows: List[Dict[str, Any]]
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+class SearchResponse(BaseModel):
+    analysis_id: int
+    text_column: str
+    total: int
+    skip: int
+    limit: int
+    results: List[Dict[str, Any]]
\ No newline at end of file
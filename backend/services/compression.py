@@ -0,0 +1,172 @@
+import gzip
+import io
+import zlib
+from typing import Optional, Tuple, BinaryIO
+
+CODECS = ("none", "gzip", "zstd")
+
+UPLOAD_EXTENSIONS = {"csv": "csv", "json": "json", "jsonl": "jsonl", "ndjson": "jsonl"}
+CODEC_EXTENSIONS = {"gz": "gzip", "gzip": "gzip", "zst": "zstd", "zstd": "zstd"}
+
+# Input slice fed to zstd per call; bounds how far past max_size one call can go
+ZSTD_INPUT_SLICE = 1024
+
+# Assumed compression ratio when an upload's headers do not record its size
+UNKNOWN_SIZE_RATIO = 5
+
+
+class DecompressedSizeError(ValueError):
+    pass
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd support requires the zstandard package to be installed")
+    return zstandard
+
+
+def detect_upload_format(filename: str) -> Tuple[str, str]:
+    """Return (file_type, codec) for names like reviews.csv, reviews.jsonl.gz or reviews.json.zst."""
+    parts = filename.lower().rsplit('.', 2)[1:]
+    codec = "none"
+    if len(parts) == 2 and parts[1] in CODEC_EXTENSIONS:
+        codec = CODEC_EXTENSIONS[parts[1]]
+        parts = parts[:1]
+    if not parts or parts[-1] not in UPLOAD_EXTENSIONS:
+        raise ValueError(
+            "Invalid file type. Please upload a CSV, JSON or JSON Lines file, "
+            "optionally compressed with gzip (.gz) or zstd (.zst)."
+        )
+    return UPLOAD_EXTENSIONS[parts[-1]], codec
+
+
+class StreamDecompressor:
+    """Incrementally decompress a gzip or zstd byte stream fed in arbitrary chunks.
+
+    Raises DecompressedSizeError once more than `max_size` bytes have been produced, and
+    from `flush()` if the stream ended before its last gzip member or zstd
+    frame was complete.
+    """
+
+    def __init__(self, codec: str, max_size: Optional[int] = None):
+        self.codec = codec
+        self.max_size = max_size
+        self.size = 0
+        self._decompressor = self._new_decompressor()
+
+    def _new_decompressor(self):
+        if self.codec == "gzip":
+            return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        if self.codec == "zstd":
+            return _zstandard().ZstdDecompressor().decompressobj()
+        return None
+
+    def _emit(self, data: bytes) -> bytes:
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise DecompressedSizeError(f"Decompressed data exceeds the {self.max_size} byte limit.")
+        return data
+
+    def _decompress_gzip(self, data: bytes) -> bytes:
+        output = bytearray()
+        while data:
+            if self._decompressor.eof:
+                # Concatenated gzip members (e.g. from `cat a.gz b.gz`) start a new stream
+                self._decompressor = self._new_decompressor()
+            # Bound the output of each call so a small bomb never expands past the limit
+            limit = 0 if self.max_size is None else self.max_size - self.size + 1
+            output += self._emit(self._decompressor.decompress(data, limit))
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+            else:
+                data = self._decompressor.unconsumed_tail
+        return bytes(output)
+
+    def _decompress_zstd(self, data: bytes) -> bytes:
+        # zstd cannot bound the output of a call, so feed small slices and check after each
+        output = bytearray()
+        view = memoryview(data)
+        position = 0
+        pending = b""
+        while pending or position < len(view):
+            if pending:
+                piece, pending = pending, b""
+            else:
+                piece = bytes(view[position:position + ZSTD_INPUT_SLICE])
+                position += ZSTD_INPUT_SLICE
+            if self._decompressor.eof:
+                # Concatenated frames start a new stream
+                self._decompressor = self._new_decompressor()
+            output += self._emit(self._decompressor.decompress(piece))
+            if self._decompressor.eof:
+                pending = self._decompressor.unused_data
+        return bytes(output)
+
+    def decompress(self, chunk: bytes) -> bytes:
+        if self.codec == "gzip":
+            return self._decompress_gzip(chunk)
+        if self.codec == "zstd":
+            return self._decompress_zstd(chunk)
+        return self._emit(chunk)
+
+    def flush(self) -> bytes:
+        if self._decompressor is None:
+            return b""
+        output = self._emit(self._decompressor.flush()) if self.codec == "gzip" else b""
+        if not self._decompressor.eof:
+            raise ValueError("Compressed data is truncated.")
+        return output
+
+
+def estimate_decompressed_size(stream: BinaryIO, codec: str, compressed_size: int) -> int:
+    """Best-effort decompressed size of a seekable upload, read from its headers.
+
+    gzip stores the size (mod 4 GiB) of its last member in the trailer and zstd
+    frames usually record it in the frame header. The stream is rewound, and the
+    result is never below the compressed size since the headers are untrusted.
+    """
+    estimate = compressed_size
+    try:
+        if codec == "gzip" and compressed_size >= 18:
+            stream.seek(-4, io.SEEK_END)
+            estimate = int.from_bytes(stream.read(4), 'little')
+        elif codec == "zstd":
+            stream.seek(0)
+            content_size = _zstandard().frame_content_size(stream.read(18))
+            if content_size > 0:
+                estimate = content_size
+            else:
+                estimate = compressed_size * UNKNOWN_SIZE_RATIO
+    except Exception:
+        estimate = compressed_size * UNKNOWN_SIZE_RATIO
+    finally:
+        stream.seek(0)
+    return max(estimate, compressed_size)
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compress(data)
+    if codec == "none":
+        return data
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def open_stream(data: bytes, codec: Optional[str]) -> BinaryIO:
+    """Open stored dataset bytes as a file object that decompresses as it is read."""
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=io.BytesIO(data))
+    if codec == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(io.BytesIO(data))
+    return io.BytesIO(data)
+
+
+def decompress(data: bytes, codec: Optional[str], max_size: Optional[int] = None) -> bytes:
+    if codec in (None, "none"):
+        return data
+    decompressor = StreamDecompressor(codec, max_size)
+    return decompressor.decompress(data) + decompressor.flush()
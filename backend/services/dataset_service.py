@@ -1,23 +1,122 @@
-import pandas as pd
+from __future__ import annotations
+
 import json
-from typing import Dict, Any, Optional, List
-from textblob import TextBlob
+import zlib
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Union, BinaryIO, Iterator, Tuple
 import io
 from models.dataset import Dataset, SentimentAnalysis
+from services import compression
+
+# pandas and TextBlob are heavy, import them on first use so workers start fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+SENTIMENT_CATEGORIES = ["very_negative", "negative", "neutral", "positive", "very_positive"]
+
+# Bucket sizes accepted by rollups, mapped to pandas period frequencies
+ROLLUP_BUCKETS = {"day": "D", "week": "W", "month": "M"}
+
+# Part of the stored rollup key; bump when the row format or grouping changes
+ROLLUP_VERSION = 2
+
+# Rows per stored row block; a search page only decodes the blocks holding its rows
+ROW_BLOCK_SIZE = 1000
+
+# Rows parsed at a time when a page has to be read from the dataset file
+READ_CHUNK_ROWS = 10000
 
 class DatasetService:
     @staticmethod
-    def read_file(file_data: bytes, file_type: str) -> pd.DataFrame:
+    def read_file(file_data: Union[bytes, BinaryIO], file_type: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        source = io.BytesIO(file_data) if isinstance(file_data, bytes) else file_data
         try:
             if file_type == 'csv':
-                return pd.read_csv(io.BytesIO(file_data))
+                return pd.read_csv(source, nrows=nrows)
+            elif file_type == 'jsonl':
+                return pd.read_json(source, lines=True, nrows=nrows)
             elif file_type == 'json':
-                return pd.read_json(io.BytesIO(file_data))
+                df = pd.read_json(source)
+                return df if nrows is None else df.head(nrows)
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
         except Exception as e:
             raise ValueError(f"Error reading file: {str(e)}")
 
+    @staticmethod
+    def read_dataset(dataset: Dataset, nrows: Optional[int] = None) -> pd.DataFrame:
+        """Read a stored dataset, decompressing it while parsing."""
+        stream = compression.open_stream(dataset.file_data, dataset.file_codec)
+        return DatasetService.read_file(stream, dataset.file_type, nrows)
+
+    @staticmethod
+    def read_rows(dataset: Dataset, row_ids: List[int]) -> pd.DataFrame:
+        """Read only the rows at the given record positions, indexed by position.
+
+        Positions count parsed records the way read_dataset does (so blank CSV
+        lines are not rows). CSV and JSON Lines parsing stops once the chunk
+        holding the last wanted row is read.
+        """
+        import pandas as pd
+
+        wanted = sorted(set(row_ids))
+        if not wanted:
+            return pd.DataFrame()
+        stream = compression.open_stream(dataset.file_data, dataset.file_codec)
+
+        if dataset.file_type == 'csv':
+            chunks = pd.read_csv(stream, chunksize=READ_CHUNK_ROWS)
+        elif dataset.file_type == 'jsonl':
+            chunks = pd.read_json(stream, lines=True, chunksize=READ_CHUNK_ROWS)
+        else:
+            chunks = [DatasetService.read_file(stream, dataset.file_type)]
+
+        parts = []
+        start = 0
+        for chunk in chunks:
+            positions = [row_id - start for row_id in wanted if start <= row_id < start + len(chunk)]
+            parts.append(chunk.iloc[positions])
+            start += len(chunk)
+            if start > wanted[-1]:
+                break
+
+        df = pd.concat(parts)
+        df.index = wanted[:len(df)]
+        return df
+
+    @staticmethod
+    def encode_row_blocks(df: pd.DataFrame, block_size: int = ROW_BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+        """Yield (block number, zlib-compressed JSON records) for every `block_size` rows."""
+        for block, start in enumerate(range(0, len(df), block_size)):
+            records = df.iloc[start:start + block_size].to_json(orient='records', date_format='iso')
+            yield block, zlib.compress(records.encode('utf-8'))
+
+    @staticmethod
+    def decode_rows(
+        blocks: Dict[int, bytes],
+        row_ids: List[int],
+        block_size: int = ROW_BLOCK_SIZE,
+    ) -> Dict[int, Dict[str, Any]]:
+        """Pick rows out of the stored blocks that hold them, keyed by row id."""
+        decoded = {block: json.loads(zlib.decompress(data)) for block, data in blocks.items()}
+        return {row_id: decoded[row_id // block_size][row_id % block_size] for row_id in row_ids}
+
+    @staticmethod
+    def profile_file(file_data: bytes, file_type: str, storage_codec: str) -> Dict[str, Any]:
+        """Parse an uploaded file and prepare what a Dataset record stores about it."""
+        df = DatasetService.read_file(file_data, file_type)
+        return {
+            # JSON arrays of arrays parse to integer column names; responses expect strings
+            "columns": [str(column) for column in df.columns],
+            # dtypes of the full parse, so chunked exports can agree on one schema
+            "column_types": {str(column): str(dtype) for column, dtype in df.dtypes.items()},
+            "row_count": len(df),
+            "text_columns": DatasetService.detect_text_columns(df),
+            "raw_size": len(file_data),
+            "stored_data": compression.compress(file_data, storage_codec),
+        }
+
     @staticmethod
     def detect_text_columns(df: pd.DataFrame) -> list:
         """Detect columns that are likely to contain text for sentiment analysis."""
@@ -32,6 +131,8 @@ class DatasetService:
 
     @staticmethod
     def analyze_sentiment(text: str) -> Dict[str, float]:
+        from textblob import TextBlob
+
         try:
             blob = TextBlob(str(text))
             return {
@@ -49,7 +150,92 @@ class DatasetService:
         elif polarity > -0.5: return "negative"
         else: return "very_negative"
 
+    @staticmethod
+    def analyze_texts(texts, memo: Optional[Dict[Any, tuple]] = None) -> List[Dict[str, Any]]:
+        """Score texts, reusing earlier scores for identical texts through `memo`."""
+        memo = {} if memo is None else memo
+        results = []
+        for text in texts:
+            # Keyed on the string form, since JSON cells can hold unhashable lists and dicts
+            key = str(text)
+            scored = memo.get(key)
+            if scored is None:
+                sentiment = DatasetService.analyze_sentiment(text)
+                scored = memo[key] = (sentiment, DatasetService.categorize_sentiment(sentiment["polarity"]))
+            results.append({
+                "text": str(text)[:100],  # Store preview of text
+                "sentiment": scored[0],
+                "category": scored[1]
+            })
+        return results
+
+    @staticmethod
+    def analyze_columns(
+        df: pd.DataFrame,
+        text_columns: List[str],
+        memo: Optional[Dict[Any, tuple]] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Score several text columns of one parsed dataset with a shared memo."""
+        memo = {} if memo is None else memo
+        return {
+            column: DatasetService.analyze_texts(df[column].fillna(""), memo)
+            for column in text_columns
+        }
+
+    @staticmethod
+    def count_sentiments(results: List[Dict[str, Any]]) -> Dict[str, int]:
+        sentiment_counts = {}
+        for result in results:
+            category = result["category"]
+            sentiment_counts[category] = sentiment_counts.get(category, 0) + 1
+        return sentiment_counts
+
     @staticmethod
     def get_dataset_preview(df: pd.DataFrame, max_rows: int = 5) -> List[Dict]:
         """Get a preview of the dataset."""
-        return df.head(max_rows).to_dict(orient='records')
\ No newline at end of file
+        return df.head(max_rows).to_dict(orient='records')
+
+    @staticmethod
+    def compute_rollup(
+        df: pd.DataFrame,
+        results: List[Dict[str, Any]],
+        group_by: List[str],
+        date_column: Optional[str] = None,
+        bucket: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Group per-row sentiment results by columns and an optional date bucket.
+
+        Each row is {"group": {column: value}, "bucket", "count", "mean_polarity",
+        "sentiment_counts"}. Helper columns use a reserved "__" prefix so they
+        never clash with dataset columns such as a product `category`.
+        """
+        import pandas as pd
+
+        frame = df[group_by].copy()
+        frame["__polarity"] = [result["sentiment"]["polarity"] for result in results]
+        frame["__category"] = [result["category"] for result in results]
+
+        keys = list(group_by)
+        if date_column:
+            # Parse in UTC so mixed offsets (e.g. across a DST change) still give datetimes
+            dates = pd.to_datetime(df[date_column], errors='coerce', utc=True).dt.tz_localize(None)
+            frame["__bucket"] = dates.dt.to_period(ROLLUP_BUCKETS[bucket]).dt.start_time
+            keys.append("__bucket")
+
+        grouped = frame.groupby(keys, dropna=False)
+        rollup = grouped["__polarity"].agg(__count="size", __mean_polarity="mean")
+        counts = grouped["__category"].value_counts().unstack(fill_value=0)
+        counts = counts.reindex(columns=SENTIMENT_CATEGORIES, fill_value=0).add_prefix("__")
+        rollup = rollup.join(counts)
+
+        records = json.loads(rollup.reset_index().to_json(orient='records', date_format='iso'))
+        return [
+            {
+                "group": {column: record[column] for column in group_by},
+                "bucket": record.get("__bucket"),
+                "count": record["__count"],
+                "mean_polarity": record["__mean_polarity"],
+                "sentiment_counts": {category: record[f"__{category}"] for category in SENTIMENT_CATEGORIES},
+            }
+            for record in records
+        ]
\ No newline at end of file
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import io
+import zlib
+from array import array
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Iterator
+
+from services import compression
+from services.dataset_service import DatasetService, SENTIMENT_CATEGORIES
+from services.search_service import CATEGORY_CODES
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+EXPORT_CHUNK_ROWS = 10000
+
+# Columns appended to every exported row, with their pandas dtypes
+SCORE_COLUMNS = {
+    "sentiment_polarity": "float64",
+    "sentiment_subjectivity": "float64",
+    "sentiment_category": "object",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ExportService:
+    @staticmethod
+    def iter_rows(
+        file_data: bytes,
+        file_type: str,
+        file_codec: Optional[str] = None,
+        chunk_rows: int = EXPORT_CHUNK_ROWS,
+    ) -> Iterator[pd.DataFrame]:
+        """Yield the stored dataset in chunks of at most `chunk_rows` rows."""
+        import pandas as pd
+
+        stream = compression.open_stream(file_data, file_codec)
+        if file_type == 'csv':
+            chunks = pd.read_csv(stream, chunksize=chunk_rows)
+        elif file_type == 'jsonl':
+            chunks = pd.read_json(stream, lines=True, chunksize=chunk_rows)
+        else:
+            # A JSON array cannot be parsed incrementally, slice it after loading
+            df = DatasetService.read_file(stream, file_type)
+            chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+
+        # Column names are stored as strings (JSON arrays of arrays parse to integer names)
+        for chunk in chunks:
+            yield chunk.rename(columns=str)
+
+    @staticmethod
+    def scores_from_results(results: List[Dict[str, Any]]) -> Dict[str, array]:
+        """Per-row score arrays laid out like a loaded search index."""
+        return {
+            "polarity": array('d', (result["sentiment"]["polarity"] for result in results)),
+            "subjectivity": array('d', (result["sentiment"]["subjectivity"] for result in results)),
+            "categories": array('B', (CATEGORY_CODES[result["category"]] for result in results)),
+        }
+
+    @staticmethod
+    def join_results(chunk: pd.DataFrame, scores: Dict[str, array], start: int) -> pd.DataFrame:
+        """Append polarity, subjectivity and category for rows `start`..`start + len(chunk)`.
+
+        `scores` holds the per-row arrays of a loaded search index (or
+        scores_from_results), so only this chunk's slice is ever expanded.
+        """
+        import numpy as np
+
+        end = start + len(chunk)
+        chunk = chunk.copy()
+        chunk["sentiment_polarity"] = np.asarray(scores["polarity"][start:end], dtype="float64")
+        chunk["sentiment_subjectivity"] = np.asarray(scores["subjectivity"][start:end], dtype="float64")
+        codes = np.asarray(scores["categories"][start:end], dtype="intp")
+        chunk["sentiment_category"] = np.asarray(SENTIMENT_CATEGORIES, dtype=object)[codes]
+        return chunk
+
+    @staticmethod
+    def widen_field(current, new):
+        """Smallest Arrow field both `current` and `new` values can be cast to."""
+        import pyarrow as pa
+
+        if current.type == new.type:
+            return current
+        try:
+            merged = pa.unify_schemas([pa.schema([current]), pa.schema([new])], promote_options='permissive')
+            return merged.field(current.name)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # e.g. numbers in one chunk and text in another
+            return pa.field(current.name, pa.string())
+
+    @staticmethod
+    def parquet_schema(column_types: Dict[str, str]) -> pa.Schema:
+        """Arrow schema for the export from the dtypes of the full upload parse.
+
+        A Parquet file has one schema, while pandas infers dtypes per chunk.
+        Numeric, boolean and datetime columns keep their type; anything else
+        (text, or text mixed with numbers) is written as strings.
+        """
+        import numpy as np
+        import pandas as pd
+        import pyarrow as pa
+
+        fields = []
+        for name, dtype_name in {**column_types, **SCORE_COLUMNS}.items():
+            try:
+                dtype = pd.api.types.pandas_dtype(dtype_name)
+            except TypeError:
+                dtype = None
+            if isinstance(dtype, np.dtype) and dtype.kind in 'biufM':
+                fields.append(pa.field(name, pa.from_numpy_dtype(dtype)))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        return pa.schema(fields)
+
+    @staticmethod
+    def scan_parquet_schema(
+        file_data: bytes,
+        file_type: str,
+        file_codec: Optional[str],
+        scores: Dict[str, array],
+        chunk_rows: int = EXPORT_CHUNK_ROWS,
+    ) -> pa.Schema:
+        """Scan every chunk and widen column types so no later chunk fails to cast.
+
+        Only needed for datasets uploaded before column types were recorded.
+        """
+        import pyarrow as pa
+
+        fields = {}
+        start = 0
+        for chunk in ExportService.iter_rows(file_data, file_type, file_codec, chunk_rows):
+            chunk = ExportService.join_results(chunk, scores, start)
+            for field in pa.Schema.from_pandas(chunk, preserve_index=False):
+                fields[field.name] = ExportService.widen_field(fields[field.name], field) if field.name in fields else field
+            start += len(chunk)
+        return pa.schema(list(fields.values()))
+
+    @staticmethod
+    def to_arrow(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+        """Convert a chunk to `schema`, filling absent columns with nulls."""
+        import pyarrow as pa
+
+        chunk = chunk.reindex(columns=schema.names)
+        for field in schema:
+            if pa.types.is_string(field.type):
+                values = chunk[field.name]
+                chunk[field.name] = values.astype(str).where(values.notna(), None)
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    @staticmethod
+    def iter_export(
+        file_data: bytes,
+        file_type: str,
+        file_codec: Optional[str],
+        scores: Dict[str, array],
+        export_format: str,
+        column_types: Optional[Dict[str, str]] = None,
+        chunk_rows: int = EXPORT_CHUNK_ROWS,
+    ) -> Iterator[bytes]:
+        """Serialize the scored dataset chunk by chunk in the requested format.
+
+        With `column_types` (recorded at upload) every chunk gets the full
+        column list and Parquet output starts without a pass over the file.
+        """
+        start = 0
+        writer = None
+        sink = _ChunkSink()
+        columns = list(column_types) + list(SCORE_COLUMNS) if column_types else None
+        if export_format == 'parquet':
+            if column_types:
+                schema = ExportService.parquet_schema(column_types)
+            else:
+                schema = ExportService.scan_parquet_schema(file_data, file_type, file_codec, scores, chunk_rows)
+
+        for chunk in ExportService.iter_rows(file_data, file_type, file_codec, chunk_rows):
+            chunk = ExportService.join_results(chunk, scores, start)
+            if columns:
+                chunk = chunk.reindex(columns=columns)
+
+            if export_format == 'csv':
+                yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
+            elif export_format == 'jsonl':
+                yield chunk.to_json(orient='records', lines=True, date_format='iso').rstrip("\n").encode('utf-8') + b"\n"
+            elif export_format == 'parquet':
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, schema)
+                writer.write_table(ExportService.to_arrow(chunk, schema))
+                yield sink.drain()
+            else:
+                raise ValueError(f"Unsupported export format: {export_format}")
+
+            start += len(chunk)
+
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+
+    @staticmethod
+    def gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
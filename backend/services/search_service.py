@@ -0,0 +1,160 @@
+import json
+import re
+import struct
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, chain
+from typing import Callable, Dict, Any, Optional, List, Iterable
+
+from services.dataset_service import SENTIMENT_CATEGORIES
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+CATEGORY_CODES = {category: code for code, category in enumerate(SENTIMENT_CATEGORIES)}
+
+# Number of decoded indexes kept in memory per worker
+INDEX_CACHE_SIZE = 8
+
+
+class SearchService:
+    """Inverted index over analyzed text: token -> sorted row ids.
+
+    The stored blob is zlib-compressed and laid out as a JSON header followed
+    by delta-encoded uint32 postings for every token, then float64 polarity
+    and subjectivity arrays and a uint8 category array with one entry per
+    row, so searches never need to load the full analysis results.
+    """
+
+    def __init__(self, cache_size: int = INDEX_CACHE_SIZE):
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
+        # Searches run on the event loop while exports read indexes from the threadpool
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tokenize(text: Any) -> List[str]:
+        return TOKEN_PATTERN.findall(str(text).lower())
+
+    @staticmethod
+    def build_index(texts: Iterable[Any], results: List[Dict[str, Any]]) -> bytes:
+        postings: Dict[str, array] = {}
+        for row_id, text in enumerate(texts):
+            for token in set(SearchService.tokenize(text)):
+                postings.setdefault(token, array('I')).append(row_id)
+
+        body = bytearray()
+        terms = {}
+        for token in sorted(postings):
+            row_ids = postings[token]
+            deltas = array('I', (current - previous for previous, current in zip(chain([0], row_ids), row_ids)))
+            terms[token] = [len(body), len(row_ids)]
+            body += deltas.tobytes()
+
+        # Scores are kept as float64 so polarity filters compare exactly against stored values
+        polarity = array('d', (result["sentiment"]["polarity"] for result in results))
+        subjectivity = array('d', (result["sentiment"]["subjectivity"] for result in results))
+        categories = array('B', (CATEGORY_CODES[result["category"]] for result in results))
+        header = {"rows": len(results), "terms": terms, "score_type": "d"}
+        for name, values in (("polarity", polarity), ("subjectivity", subjectivity), ("categories", categories)):
+            header[name] = len(body)
+            body += values.tobytes()
+
+        header_bytes = json.dumps(header).encode('utf-8')
+        return zlib.compress(struct.pack('<I', len(header_bytes)) + header_bytes + bytes(body))
+
+    @staticmethod
+    def load_index(data: bytes) -> Dict[str, Any]:
+        raw = zlib.decompress(data)
+        (header_length,) = struct.unpack_from('<I', raw)
+        header = json.loads(raw[4:4 + header_length])
+        body = memoryview(raw)[4 + header_length:]
+
+        rows = header["rows"]
+        # Indexes built before scores were stored as float64 hold float32 polarity only
+        score_type = header.get("score_type", "f")
+
+        def read_array(name, typecode):
+            values = array(typecode)
+            if name in header:
+                values.frombytes(body[header[name]:header[name] + values.itemsize * rows])
+            return values
+
+        return {
+            "rows": rows,
+            "terms": header["terms"],
+            "body": body,
+            "polarity": read_array("polarity", score_type),
+            "subjectivity": read_array("subjectivity", score_type),
+            "categories": read_array("categories", 'B'),
+        }
+
+    def get_index(self, index_id: int, load_data: Callable[[], bytes]) -> Dict[str, Any]:
+        """Return a decoded index, reusing recently decoded ones.
+
+        `load_data` fetches the stored blob and is only called on a cache miss.
+        """
+        with self._lock:
+            if index_id in self._cache:
+                self._cache.move_to_end(index_id)
+                return self._cache[index_id]
+
+        index = self.load_index(load_data())
+        with self._lock:
+            self._cache[index_id] = index
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return index
+
+    @staticmethod
+    def postings(index: Dict[str, Any], token: str) -> List[int]:
+        if token not in index["terms"]:
+            return []
+        offset, count = index["terms"][token]
+        deltas = array('I')
+        deltas.frombytes(index["body"][offset:offset + deltas.itemsize * count])
+        return list(accumulate(deltas))
+
+    @staticmethod
+    def search(
+        index: Dict[str, Any],
+        query: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        min_polarity: Optional[float] = None,
+        max_polarity: Optional[float] = None,
+    ) -> List[int]:
+        """Return the sorted row ids containing every query token and matching the filters."""
+        tokens = set(SearchService.tokenize(query)) if query else set()
+        if tokens:
+            matches = None
+            # Intersect starting from the rarest token to keep the candidate set small
+            for token in sorted(tokens, key=lambda t: index["terms"].get(t, [0, 0])[1]):
+                row_ids = SearchService.postings(index, token)
+                matches = set(row_ids) if matches is None else matches.intersection(row_ids)
+                if not matches:
+                    return []
+            row_ids = sorted(matches)
+        else:
+            row_ids = range(index["rows"])
+
+        if categories:
+            codes = {CATEGORY_CODES[category] for category in categories}
+            row_ids = [row_id for row_id in row_ids if index["categories"][row_id] in codes]
+        if min_polarity is not None:
+            row_ids = [row_id for row_id in row_ids if index["polarity"][row_id] >= min_polarity]
+        if max_polarity is not None:
+            row_ids = [row_id for row_id in row_ids if index["polarity"][row_id] <= max_polarity]
+
+        return list(row_ids)
+
+    @staticmethod
+    def scores(index: Dict[str, Any], row_id: int) -> Dict[str, Any]:
+        """Sentiment and category of one row, as stored in the analysis results."""
+        subjectivity = index["subjectivity"]
+        return {
+            "sentiment": {
+                "polarity": index["polarity"][row_id],
+                "subjectivity": subjectivity[row_id] if subjectivity else None,
+            },
+            "category": SENTIMENT_CATEGORIES[index["categories"][row_id]],
+        }
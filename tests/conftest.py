@@ -0,0 +1,55 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+# Importing the models creates the engine; avoid needing a PostgreSQL driver in tests
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# The backend is run from its own directory and imports modules top-level
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+
+@pytest.fixture(scope = "session")
+def client():
+	"""API client on one in-memory database shared by every thread of the test run."""
+	from fastapi.testclient import TestClient
+	from sqlalchemy import create_engine
+	from sqlalchemy.orm import sessionmaker
+	from sqlalchemy.pool import StaticPool
+
+	import models.dataset  # noqa: F401
+	import models.user  # noqa: F401
+	from database import Base, get_db
+	from main import app
+
+	engine = create_engine("sqlite://", connect_args = {"check_same_thread": False}, poolclass = StaticPool)
+	Base.metadata.create_all(bind = engine)
+	TestingSession = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+
+	def override_get_db():
+		db = TestingSession()
+		try:
+			yield db
+		finally:
+			db.close()
+
+	app.dependency_overrides[get_db] = override_get_db
+	yield TestClient(app)
+	app.dependency_overrides.clear()
+
+
+_usernames = itertools.count()
+
+
+@pytest.fixture
+def login(client):
+	"""Register a fresh user and return its Authorization headers."""
+	def login():
+		username = f"user{next(_usernames)}"
+		client.post("/auth/register", data = {"username": username, "password": "password1"})
+		response = client.post("/auth/token", data = {"username": username, "password": "password1"})
+		return {"Authorization": f"Bearer {response.json()['access_token']}"}
+	return login
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from services.dataset_service import DatasetService
+
+
+def upload(client, headers, data):
+	response = client.post("/reviews/dataset", files = {"file": ("r.csv", data)}, data = {"name": "r"}, headers = headers)
+	assert response.status_code == 200
+	return response.json()["dataset_id"]
+
+
+def test_analyze_texts_accepts_list_cells():
+	results = DatasetService.analyze_texts([["great", "value"], ["great", "value"], {"a": 1}])
+	assert [result["text"] for result in results] == ["['great', 'value']", "['great', 'value']", "{'a': 1}"]
+
+
+def test_analyze_columns_scores_repeated_texts_once(monkeypatch):
+	calls = []
+	analyze_sentiment = DatasetService.analyze_sentiment
+
+	def counting(text):
+		calls.append(text)
+		return analyze_sentiment(text)
+
+	monkeypatch.setattr(DatasetService, "analyze_sentiment", counting)
+	df = pd.DataFrame({"review": ["great", "awful", None], "title": ["great", "fine", "awful"]})
+
+	results = DatasetService.analyze_columns(df, ["review", "title"])
+
+	assert list(results) == ["review", "title"]
+	assert results["title"][0] == results["review"][0]
+	assert results["title"][2] == results["review"][1]
+	assert sorted(calls) == ["", "awful", "fine", "great"]
+
+
+def test_analyze_several_datasets_and_columns(client, login):
+	headers = login()
+	first = upload(client, headers, b"review,title\nthis is great,awful\n")
+	second = upload(client, headers, b"review,title\nthis is awful,great\nfine,fine\n")
+
+	response = client.post(
+		f"/reviews/dataset/{first}/analyze",
+		params = {"text_column": ["review", "title"], "dataset_ids": [second]},
+		headers = headers
+	)
+
+	assert response.status_code == 200
+	body = response.json()
+	assert [(analysis["dataset_id"], analysis["text_column"], analysis["row_count"]) for analysis in body["analyses"]] == [
+		(first, "review", 1), (first, "title", 1), (second, "review", 2), (second, "title", 2)
+	]
+	assert body["analysis_id"] == body["analyses"][0]["analysis_id"]
+	assert sum(body["sentiment_counts"].values()) == 6
+
+
+def test_analyze_rejects_another_users_dataset(client, login):
+	owner = login()
+	other_dataset = upload(client, owner, b"review\nthis is great\n")
+	headers = login()
+	own_dataset = upload(client, headers, b"review\nthis is great\n")
+
+	response = client.post(
+		f"/reviews/dataset/{own_dataset}/analyze",
+		params = {"text_column": "review", "dataset_ids": [other_dataset]},
+		headers = headers
+	)
+	assert response.status_code == 404
+	assert str(other_dataset) in response.json()["detail"]
+
+	response = client.post(f"/reviews/dataset/{other_dataset}/analyze", params = {"text_column": "review"}, headers = headers)
+	assert response.status_code == 404
+
+	response = client.get(f"/reviews/dataset/{own_dataset}/analyses", headers = headers)
+	assert response.json() == []
@@ -0,0 +1,93 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models.dataset  # noqa: F401
+import models.user  # noqa: F401
+from core.config import settings
+from database import Base
+from models.dataset import Dataset
+from routes import dataset as dataset_routes
+
+
+@pytest.fixture
+def db():
+	engine = create_engine("sqlite://")
+	Base.metadata.create_all(bind = engine)
+	session = sessionmaker(bind = engine)()
+	yield session
+	session.close()
+
+
+def make_archive(members):
+	buffer = io.BytesIO()
+	with zipfile.ZipFile(buffer, "w") as archive:
+		for name, data in members.items():
+			archive.writestr(name, data)
+	buffer.seek(0)
+	return buffer
+
+
+GOOD_CSV = b"id,review\n1,this product is really great value\n2,arrived late and broken\n"
+
+
+def test_bad_members_do_not_abort_the_archive(db, monkeypatch):
+	monkeypatch.setattr(settings, "BULK_MAX_MEMBER_BYTES", 1024 * 1024)
+	archive = make_archive({
+		"shards/a.csv": GOOD_CSV,
+		"shards/b.csv.gz": gzip.compress(GOOD_CSV),
+		"shards/notes.txt": b"ignored",
+		"shards/empty.csv": b"id,review\n",
+		"shards/truncated.csv.gz": gzip.compress(GOOD_CSV)[:20],
+		# ~16 MB of zeros in a few KB: over the limit only once decompressed
+		"shards/bomb.csv.gz": gzip.compress(b"\0" * (16 * 1024 * 1024)),
+		"__MACOSX/._a.csv": b"junk",
+	})
+
+	summary = dataset_routes._ingest_archive(db, 1, archive, "batch-", None)
+
+	results = {result["member"]: result for result in summary["results"]}
+	assert summary["created"] == 2
+	assert summary["failed"] == 4
+	assert "__MACOSX/._a.csv" not in results
+	assert results["shards/a.csv"]["row_count"] == 2
+	assert results["shards/a.csv"]["text_columns"] == ["review"]
+	assert results["shards/b.csv.gz"]["name"] == "batch-b"
+	assert results["shards/notes.txt"]["error"]
+	assert results["shards/empty.csv"]["error"]
+	assert "truncated" in results["shards/truncated.csv.gz"]["error"]
+	assert "limit" in results["shards/bomb.csv.gz"]["error"]
+	assert db.query(Dataset).count() == 2
+
+
+def test_batches_flush_on_bytes(db, monkeypatch):
+	monkeypatch.setattr(settings, "BULK_INSERT_BATCH", 1000)
+	monkeypatch.setattr(settings, "BULK_INSERT_BATCH_BYTES", 1)
+	commits = []
+	original_commit = db.commit
+	monkeypatch.setattr(db, "commit", lambda: (commits.append(1), original_commit()))
+
+	archive = make_archive({f"{i}.csv": GOOD_CSV for i in range(3)})
+	summary = dataset_routes._ingest_archive(db, 1, archive, "", None)
+
+	assert summary["created"] == 3
+	assert len(commits) == 3
+
+
+def test_corrupt_central_directory_is_rejected(client, login):
+	data = bytearray(make_archive({"a.csv": GOOD_CSV}).getvalue())
+	offset = data.rfind(b"PK\x01\x02")
+	data[offset:offset + 4] = b"XXXX"  # still found by is_zipfile, unreadable by ZipFile
+
+	response = client.post(
+		"/reviews/datasets/bulk",
+		files = {"file": ("archive.zip", bytes(data))},
+		headers = login()
+	)
+
+	assert response.status_code == 400
+	assert response.json()["detail"].startswith("Invalid archive")
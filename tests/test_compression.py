@@ -0,0 +1,97 @@
+import gzip
+import io
+
+import pytest
+import zstandard
+
+from services import compression
+from services.compression import StreamDecompressor, DecompressedSizeError
+
+
+def feed(decompressor, data, chunk_size = 7):
+	output = b"".join(decompressor.decompress(data[i:i + chunk_size]) for i in range(0, len(data), chunk_size))
+	return output + decompressor.flush()
+
+
+@pytest.mark.parametrize("filename, expected", [
+	("reviews.csv", ("csv", "none")),
+	("reviews.JSON", ("json", "none")),
+	("reviews.jsonl.gz", ("jsonl", "gzip")),
+	("reviews.ndjson.zst", ("jsonl", "zstd")),
+	("my.reviews.csv", ("csv", "none")),
+])
+def test_detect_upload_format(filename, expected):
+	assert compression.detect_upload_format(filename) == expected
+
+
+@pytest.mark.parametrize("filename", ["reviews.gz", "reviews.txt", "reviews"])
+def test_detect_upload_format_rejects_unknown(filename):
+	with pytest.raises(ValueError):
+		compression.detect_upload_format(filename)
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip", "zstd"])
+def test_round_trip(codec):
+	data = b"id,text\n" + b"1,great product\n" * 1000
+	stored = compression.compress(data, codec)
+	assert compression.decompress(stored, codec) == data
+	assert compression.open_stream(stored, codec).read() == data
+
+
+def test_concatenated_gzip_members_split_across_chunks():
+	data = gzip.compress(b"a,b\n") + gzip.compress(b"1,2\n")
+	assert feed(StreamDecompressor("gzip"), data, chunk_size = 3) == b"a,b\n1,2\n"
+
+
+def test_concatenated_zstd_frames():
+	compressor = zstandard.ZstdCompressor()
+	data = compressor.compress(b"a,b\n") + compressor.compress(b"1,2\n")
+	assert feed(StreamDecompressor("zstd"), data, chunk_size = 5) == b"a,b\n1,2\n"
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_truncated_stream_is_rejected(codec):
+	stored = compression.compress(b"1,great product\n" * 10000, codec)
+	with pytest.raises(ValueError, match = "truncated"):
+		feed(StreamDecompressor(codec), stored[:len(stored) // 2], chunk_size = 1024)
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_decompressed_size_is_limited(codec):
+	# ~200 MB of zeros compresses to a few hundred KB at most
+	stored = compression.compress(b"\0" * (200 * 1024 * 1024), codec)
+	decompressor = StreamDecompressor(codec, max_size = 1024 * 1024)
+	with pytest.raises(DecompressedSizeError):
+		feed(decompressor, stored, chunk_size = 64 * 1024)
+	# The limit is enforced while decompressing, not after the whole stream is expanded
+	assert decompressor.size < 64 * 1024 * 1024
+
+
+def test_decompress_helper_applies_limit():
+	stored = compression.compress(b"x" * 10000, "gzip")
+	with pytest.raises(DecompressedSizeError):
+		compression.decompress(stored, "gzip", max_size = 1000)
+	assert compression.decompress(stored, "gzip", max_size = 10000) == b"x" * 10000
+
+
+def test_uncompressed_size_is_limited():
+	with pytest.raises(DecompressedSizeError):
+		feed(StreamDecompressor("none", max_size = 10), b"x" * 11)
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_estimate_decompressed_size_reads_headers(codec):
+	data = b"1,great product\n" * 10000
+	stored = compression.compress(data, codec)
+	stream = io.BytesIO(stored)
+	stream.seek(5)
+
+	assert compression.estimate_decompressed_size(stream, codec, len(stored)) == len(data)
+	assert stream.tell() == 0
+
+
+def test_estimate_decompressed_size_without_recorded_size():
+	compressor = zstandard.ZstdCompressor(write_content_size = False)
+	stored = compressor.compress(b"x" * 10000)
+	estimate = compression.estimate_decompressed_size(io.BytesIO(stored), "zstd", len(stored))
+	assert estimate == len(stored) * compression.UNKNOWN_SIZE_RATIO
@@ -0,0 +1,127 @@
+import gzip
+import io
+import json
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from services import compression
+from services.dataset_service import DatasetService
+from services.export_service import ExportService
+
+
+def results_for(count):
+	return [
+		{"sentiment": {"polarity": 0.5, "subjectivity": 0.1}, "category": "positive"}
+		for _ in range(count)
+	]
+
+
+def export(data, file_type, export_format, codec = "none", chunk_rows = 2, rows = None, column_types = None):
+	stored = compression.compress(data, codec)
+	scores = ExportService.scores_from_results(results_for(rows))
+	return b"".join(ExportService.iter_export(stored, file_type, codec, scores, export_format, column_types, chunk_rows))
+
+
+def column_types(data, file_type):
+	return DatasetService.profile_file(data, file_type, "none")["column_types"]
+
+
+# `note` is empty in the first chunk, so pandas reads it as float there and as text later
+CSV = b"id,note\n1,\n2,\n3,hello\n4,world\n5,\n"
+
+
+def test_parquet_widens_column_whose_type_changes_between_chunks():
+	output = export(CSV, "csv", "parquet", codec = "gzip", rows = 5)
+
+	table = pq.read_table(io.BytesIO(output))
+	assert table.num_rows == 5
+	assert table.column("note").to_pylist() == [None, None, "hello", "world", None]
+	assert table.column("sentiment_category").to_pylist() == ["positive"] * 5
+
+
+def test_parquet_handles_numbers_then_text():
+	data = b"id,code\n1,10\n2,20\n3,abc\n"
+	table = pq.read_table(io.BytesIO(export(data, "csv", "parquet", rows = 3)))
+	assert table.column("code").to_pylist() == ["10", "20", "abc"]
+
+
+def test_parquet_handles_jsonl_keys_missing_from_a_chunk():
+	data = b'{"id": 1}\n{"id": 2}\n{"id": 3, "extra": "x"}\n'
+	table = pq.read_table(io.BytesIO(export(data, "jsonl", "parquet", rows = 3)))
+	assert table.column("extra").to_pylist() == [None, None, "x"]
+
+
+def test_csv_export_writes_one_header():
+	output = export(CSV, "csv", "csv", rows = 5).decode()
+	df = pd.read_csv(io.StringIO(output))
+	assert len(df) == 5
+	assert list(df.columns[-3:]) == ["sentiment_polarity", "sentiment_subjectivity", "sentiment_category"]
+
+
+def test_jsonl_export_with_gzip_stream():
+	chunks = ExportService.iter_export(
+		compression.compress(CSV, "zstd"), "csv", "zstd", ExportService.scores_from_results(results_for(5)), "jsonl", None, 2
+	)
+	output = gzip.decompress(b"".join(ExportService.gzip_stream(chunks))).decode()
+	lines = [json.loads(line) for line in output.splitlines()]
+	assert [line["id"] for line in lines] == [1, 2, 3, 4, 5]
+
+
+
+def test_parquet_with_recorded_column_types_does_not_scan_the_file(monkeypatch):
+	def scan(*args, **kwargs):
+		raise AssertionError("the file should not be scanned before streaming")
+
+	monkeypatch.setattr(ExportService, "scan_parquet_schema", scan)
+	data = b"id,code,note\n1,10,\n2,20,\n3,abc,hello\n"
+
+	output = export(data, "csv", "parquet", rows = 3, column_types = column_types(data, "csv"))
+
+	table = pq.read_table(io.BytesIO(output))
+	assert table.column("id").to_pylist() == [1, 2, 3]
+	assert table.column("code").to_pylist() == ["10", "20", "abc"]
+	assert table.column("note").to_pylist() == [None, None, "hello"]
+	assert table.column("sentiment_polarity").to_pylist() == [0.5] * 3
+
+
+def test_recorded_column_types_keep_jsonl_columns_in_every_chunk():
+	data = b'{"id": 1}\n{"id": 2}\n{"id": 3, "extra": "x"}\n'
+
+	output = export(data, "jsonl", "csv", rows = 3, column_types = column_types(data, "jsonl")).decode()
+
+	df = pd.read_csv(io.StringIO(output))
+	assert list(df.columns[:2]) == ["id", "extra"]
+	assert df["extra"].tolist()[2] == "x"
+
+
+def test_scores_from_index_match_results():
+	from services.search_service import SearchService
+
+	results = [
+		{"sentiment": {"polarity": -0.25, "subjectivity": 0.75}, "category": "negative"},
+		{"sentiment": {"polarity": 0.5, "subjectivity": 0.1}, "category": "positive"},
+	]
+	index = SearchService.load_index(SearchService.build_index(["bad", "good"], results))
+	chunk = pd.DataFrame({"text": ["bad", "good"]})
+
+	joined = ExportService.join_results(chunk, index, 0)
+
+	assert joined.equals(ExportService.join_results(chunk, ExportService.scores_from_results(results), 0))
+	assert joined["sentiment_category"].tolist() == ["negative", "positive"]
+
+
+def test_export_endpoint_streams_scores_from_the_index(client, login):
+	headers = login()
+	data = b"id,review\n1,this is great\n\n2,this is awful\n"
+	response = client.post("/reviews/dataset", files = {"file": ("r.csv", data)}, data = {"name": "r"}, headers = headers)
+	dataset_id = response.json()["dataset_id"]
+	response = client.post(f"/reviews/dataset/{dataset_id}/analyze", params = {"text_column": "review"}, headers = headers)
+	analysis_id = response.json()["analysis_id"]
+
+	response = client.get(f"/reviews/analysis/{analysis_id}/export", params = {"format": "parquet"}, headers = headers)
+
+	assert response.status_code == 200
+	table = pq.read_table(io.BytesIO(response.content))
+	assert table.column("id").to_pylist() == [1, 2]
+	assert table.column("sentiment_category").to_pylist() == ["very_positive", "very_negative"]
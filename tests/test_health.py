@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.config import settings
+from database import get_db
+from main import app
+
+
+def test_ready_checks_the_schema(client, monkeypatch):
+	monkeypatch.setattr(settings, "PRELOAD_LEXICON", False)
+
+	response = client.get("/health/ready")
+	assert response.status_code == 200
+	assert response.json()["checks"]["schema"] is True
+
+	# A reachable database whose tables were never created is not ready
+	empty = sessionmaker(bind = create_engine("sqlite://", connect_args = {"check_same_thread": False}, poolclass = StaticPool))
+
+	def empty_db():
+		db = empty()
+		try:
+			yield db
+		finally:
+			db.close()
+
+	monkeypatch.setitem(app.dependency_overrides, get_db, empty_db)
+	response = client.get("/health/ready")
+	assert response.status_code == 503
+	assert response.json()["checks"] == {"database": True, "schema": False, "lexicon": True}
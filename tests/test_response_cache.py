@@ -0,0 +1,90 @@
+import json
+
+from core.cache import ResponseCache, GZIP_ETAG_SUFFIX
+from database import get_db
+from main import app
+from models.dataset import Dataset
+
+
+def upload(client, headers, data = b"id,review\n1,this product is really great value\n", filename = "r.csv"):
+	response = client.post("/reviews/dataset", files = {"file": (filename, data)}, data = {"name": "r"}, headers = headers)
+	assert response.status_code == 200
+	return response.json()["dataset_id"]
+
+
+def test_listing_answers_304_for_a_matching_etag(client, login):
+	headers = login()
+	upload(client, headers)
+
+	response = client.get("/reviews/datasets", headers = headers)
+	assert response.status_code == 200
+	etag = response.headers["etag"]
+
+	response = client.get("/reviews/datasets", headers = {**headers, "If-None-Match": etag})
+	assert response.status_code == 304
+	assert response.headers["etag"] == etag
+
+
+def test_gzip_etag_variant_matches(client, login):
+	headers = {**login(), "Accept-Encoding": "gzip"}
+	data = b"id,review\n" + b"".join(f"{i},this product is really great value {i}\n".encode() for i in range(50))
+	dataset_id = upload(client, headers, data)
+	params = {"preview": True, "preview_rows": 50}
+
+	response = client.get(f"/reviews/dataset/{dataset_id}", params = params, headers = headers)
+	assert response.headers["content-encoding"] == "gzip"
+	etag = response.headers["etag"]
+	assert etag.endswith(GZIP_ETAG_SUFFIX + '"')
+	assert len(response.json()["preview"]) == 50
+
+	response = client.get(f"/reviews/dataset/{dataset_id}", params = params, headers = {**headers, "If-None-Match": etag})
+	assert response.status_code == 304
+
+
+def test_upload_invalidates_the_cached_listing(client, login):
+	headers = login()
+	upload(client, headers)
+	first = client.get("/reviews/datasets", headers = headers)
+	assert len(first.json()) == 1
+
+	upload(client, headers)
+	response = client.get("/reviews/datasets", headers = {**headers, "If-None-Match": first.headers["etag"]})
+
+	assert response.status_code == 200
+	assert len(response.json()) == 2
+
+
+def test_listing_handles_integer_and_legacy_encoded_columns(client, login):
+	headers = login()
+	dataset_id = upload(client, headers, b'[[1, "this product is really great value"], [2, "bad"]]', "r.json")
+
+	# Rows written before the fix hold the column list as a JSON-encoded string
+	db = next(app.dependency_overrides[get_db]())
+	legacy = db.get(Dataset, dataset_id)
+	legacy.columns = json.dumps(["id", "review"])
+	db.commit()
+	db.close()
+	upload(client, headers, b'[[1, "this product is really great value"]]', "r.json")
+
+	response = client.get("/reviews/datasets", headers = headers)
+
+	assert response.status_code == 200
+	assert [dataset["columns"] for dataset in response.json()] == [["id", "review"], ["0", "1"]]
+
+
+def test_cache_bounds_and_invalidation():
+	cache = ResponseCache(max_entries_per_user = 2, max_users = 2)
+	cache.set(1, "a", '"1"', b"a")
+	cache.set(1, "b", '"1"', b"b")
+	cache.set(1, "c", '"1"', b"c")
+	assert cache.get(1, "a", '"1"') is None
+	assert cache.get(1, "c", '"1"')["body"] == b"c"
+	assert cache.get(1, "c", '"2"') is None
+
+	cache.set(2, "a", '"1"', b"a")
+	cache.set(3, "a", '"1"', b"a")
+	assert cache.get(1, "c", '"1"') is None  # least recently used user evicted
+
+	cache.invalidate(2)
+	assert cache.get(2, "a", '"1"') is None
+	assert cache.get(3, "a", '"1"') is not None
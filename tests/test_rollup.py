@@ -0,0 +1,71 @@
+import pandas as pd
+
+from services.dataset_service import DatasetService
+
+
+def result(polarity, category):
+	return {"sentiment": {"polarity": polarity, "subjectivity": 0.5}, "category": category}
+
+
+def test_rollup_groups_by_dataset_column_named_category():
+	df = pd.DataFrame({
+		"category": ["shoes", "shoes", "books"],
+		"text": ["bad", "great", "fine"],
+	})
+	results = [result(-0.8, "very_negative"), result(0.8, "very_positive"), result(0.0, "neutral")]
+
+	rows = DatasetService.compute_rollup(df, results, ["category"])
+
+	by_group = {row["group"]["category"]: row for row in rows}
+	assert set(by_group) == {"shoes", "books"}
+	assert by_group["shoes"]["count"] == 2
+	assert by_group["shoes"]["mean_polarity"] == 0.0
+	assert by_group["shoes"]["sentiment_counts"]["very_negative"] == 1
+	assert by_group["shoes"]["sentiment_counts"]["very_positive"] == 1
+	assert by_group["books"]["sentiment_counts"]["neutral"] == 1
+
+
+def test_rollup_buckets_dates_and_allows_stat_named_columns():
+	df = pd.DataFrame({
+		"count": [1, 1, 2],
+		"date": ["2024-01-01", "2024-01-02", "2024-01-20"],
+	})
+	results = [result(0.2, "positive"), result(0.4, "positive"), result(-0.2, "negative")]
+
+	rows = DatasetService.compute_rollup(df, results, ["count"], date_column = "date", bucket = "month")
+
+	assert len(rows) == 2
+	first = next(row for row in rows if row["group"]["count"] == 1)
+	assert first["bucket"].startswith("2024-01-01")
+	assert first["count"] == 2
+	assert abs(first["mean_polarity"] - 0.3) < 1e-9
+
+
+def test_rollup_buckets_timestamps_with_mixed_offsets():
+	df = pd.DataFrame({
+		"date": ["2024-03-30T10:00:00+01:00", "2024-04-02T10:00:00+02:00", "2024-04-03T10:00:00+02:00"],
+	})
+	results = [result(0.2, "positive"), result(0.4, "positive"), result(-0.2, "negative")]
+
+	rows = DatasetService.compute_rollup(df, results, [], date_column = "date", bucket = "month")
+
+	assert [(row["bucket"][:10], row["count"]) for row in rows] == [("2024-03-01", 1), ("2024-04-01", 2)]
+
+
+def test_rollup_endpoint_ignores_repeated_group_by(client, login):
+	headers = login()
+	data = b"product,review\nshoes,this is great\nshoes,this is awful\nbooks,this is fine\n"
+	response = client.post("/reviews/dataset", files = {"file": ("r.csv", data)}, data = {"name": "r"}, headers = headers)
+	dataset_id = response.json()["dataset_id"]
+	response = client.post(f"/reviews/dataset/{dataset_id}/analyze", params = {"text_column": "review"}, headers = headers)
+	analysis_id = response.json()["analysis_id"]
+
+	response = client.get(
+		f"/reviews/analysis/{analysis_id}/rollup",
+		params = {"group_by": ["product", "product"]},
+		headers = headers
+	)
+
+	assert response.status_code == 200
+	assert response.json()["group_by"] == ["product"]
+	assert {row["group"]["product"]: row["count"] for row in response.json()["rows"]} == {"shoes": 2, "books": 1}
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.scheduler import HeavyOperationScheduler
+
+
+def run(coroutine):
+	return asyncio.run(coroutine)
+
+
+def test_dispatch_is_fair_across_users():
+	order = []
+
+	async def job(scheduler, gate, user_id, name):
+		async with scheduler.slot(user_id, cost = 1.0):
+			order.append(name)
+			await gate.wait()
+
+	async def main():
+		scheduler = HeavyOperationScheduler(1, 1, 5)
+		gate = asyncio.Event()
+		# User 1 queues three jobs before user 2 queues two
+		tasks = [asyncio.create_task(job(scheduler, gate, 1, f"a{i}")) for i in range(3)]
+		await asyncio.sleep(0)
+		tasks += [asyncio.create_task(job(scheduler, gate, 2, f"b{i}")) for i in range(2)]
+		await asyncio.sleep(0)
+		gate.set()
+		await asyncio.gather(*tasks)
+
+	run(main())
+	assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+
+def test_full_user_queue_is_rejected_with_position():
+	async def main():
+		scheduler = HeavyOperationScheduler(1, 1, 1)
+		gate = asyncio.Event()
+
+		async def hold():
+			async with scheduler.slot(1):
+				await gate.wait()
+
+		running = asyncio.create_task(hold())
+		await asyncio.sleep(0)
+		queued = asyncio.create_task(hold())
+		await asyncio.sleep(0)
+
+		with pytest.raises(HTTPException) as error:
+			async with scheduler.slot(1):
+				pass
+		gate.set()
+		await asyncio.gather(running, queued)
+		return error.value, scheduler.metrics()
+
+	error, metrics = run(main())
+	assert error.status_code == 429
+	assert error.detail["queued"] == 1
+	assert error.detail["queue_position"] == 1
+	assert metrics["rejected"] == 1
+	assert metrics["running"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_slot_when_released_concurrently():
+	async def main():
+		scheduler = HeavyOperationScheduler(1, 1, 5)
+		gate = asyncio.Event()
+
+		async def hold():
+			async with scheduler.slot(1):
+				await gate.wait()
+
+		async def wait_for_slot(user_id):
+			async with scheduler.slot(user_id):
+				return "ran"
+
+		holder = asyncio.create_task(hold())
+		await asyncio.sleep(0)
+		waiter = asyncio.create_task(wait_for_slot(2))
+		await asyncio.sleep(0)
+
+		# Release the slot and cancel the waiter before either task runs again
+		gate.set()
+		waiter.cancel()
+		await holder
+
+		late = await asyncio.wait_for(wait_for_slot(3), timeout = 1)
+		with pytest.raises(asyncio.CancelledError):
+			await waiter
+		return late, scheduler.metrics()
+
+	late, metrics = run(main())
+	assert late == "ran"
+	assert metrics["running"] == 0
+	assert metrics["queue_depth"] == 0
+
+
+def test_cancelled_waiter_leaves_queue():
+	async def main():
+		scheduler = HeavyOperationScheduler(1, 1, 5)
+		gate = asyncio.Event()
+
+		async def hold():
+			async with scheduler.slot(1):
+				await gate.wait()
+
+		holder = asyncio.create_task(hold())
+		await asyncio.sleep(0)
+		waiter = asyncio.create_task(hold())
+		await asyncio.sleep(0)
+		assert scheduler.queue_depth == 1
+
+		waiter.cancel()
+		await asyncio.sleep(0)
+		depth = scheduler.queue_depth
+		gate.set()
+		await holder
+		return depth, scheduler.metrics()
+
+	depth, metrics = run(main())
+	assert depth == 0
+	assert metrics["running"] == 0
+
+
+def test_metrics_do_not_expose_user_ids():
+	async def main():
+		scheduler = HeavyOperationScheduler(1, 1, 5)
+		gate = asyncio.Event()
+
+		async def hold(user_id):
+			async with scheduler.slot(user_id):
+				await gate.wait()
+
+		tasks = [asyncio.create_task(hold(user_id)) for user_id in (41, 42, 42)]
+		await asyncio.sleep(0)
+		metrics = scheduler.metrics()
+		gate.set()
+		await asyncio.gather(*tasks)
+		return metrics
+
+	metrics = run(main())
+	assert metrics["queue_depth"] == 2
+	assert metrics["users_queued"] == 1
+	assert metrics["max_user_queue"] == 2
+	assert "queued_per_user" not in metrics
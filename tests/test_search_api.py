@@ -0,0 +1,41 @@
+def upload(client, headers, data, filename = "reviews.csv"):
+	response = client.post("/reviews/dataset", files = {"file": (filename, data)}, data = {"name": "reviews"}, headers = headers)
+	assert response.status_code == 200
+	return response.json()["dataset_id"]
+
+
+def test_search_returns_rows_after_blank_lines(client, login):
+	headers = login()
+	data = b"id,review\n1,i want a refund\n\n2,great\n3,refund please\n4,refund it now\n"
+	dataset_id = upload(client, headers, data)
+	assert client.post(f"/reviews/dataset/{dataset_id}/analyze", params = {"text_column": "review"}, headers = headers).status_code == 200
+
+	response = client.get(f"/reviews/dataset/{dataset_id}/search", params = {"q": "refund"}, headers = headers)
+
+	body = response.json()
+	assert body["total"] == 3
+	assert [(result["row_id"], result["row"]["id"]) for result in body["results"]] == [(0, 1), (2, 3), (3, 4)]
+	assert body["results"][2]["text"] == "refund it now"
+
+
+def test_search_requires_text_column_when_several_are_indexed(client, login):
+	headers = login()
+	data = b"id,review,title\n" + b"".join(f"{i},i want a refund,a nice title\n".encode() for i in range(5))
+	dataset_id = upload(client, headers, data)
+	response = client.post(
+		f"/reviews/dataset/{dataset_id}/analyze",
+		params = {"text_column": ["review", "title"]},
+		headers = headers
+	)
+	assert response.status_code == 200
+
+	response = client.get(f"/reviews/dataset/{dataset_id}/search", params = {"q": "refund"}, headers = headers)
+	assert response.status_code == 400
+	assert "review, title" in response.json()["detail"]
+
+	response = client.get(
+		f"/reviews/dataset/{dataset_id}/search",
+		params = {"q": "refund", "text_column": "review"},
+		headers = headers
+	)
+	assert response.json()["total"] == 5
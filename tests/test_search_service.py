@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from services import compression
+from services.dataset_service import DatasetService
+from services.search_service import SearchService
+
+
+def result(polarity, category):
+	return {"sentiment": {"polarity": polarity, "subjectivity": 0.25}, "category": category}
+
+
+TEXTS = ["Need a refund now", "Great product", "Refund refund, bad", 5, "ok"]
+RESULTS = [
+	result(-0.8, "very_negative"),
+	result(0.7, "very_positive"),
+	result(-0.3, "negative"),
+	result(0.0, "neutral"),
+	result(0.1, "positive"),
+]
+
+
+@pytest.fixture
+def index():
+	return SearchService.load_index(SearchService.build_index(TEXTS, RESULTS))
+
+
+def test_keyword_terms_are_intersected(index):
+	assert SearchService.search(index, "refund") == [0, 2]
+	assert SearchService.search(index, "REFUND bad") == [2]
+	assert SearchService.search(index, "refund great") == []
+	assert SearchService.search(index, "missing") == []
+	assert SearchService.search(index, "5") == [3]
+
+
+def test_category_filter(index):
+	assert SearchService.search(index, "refund", categories = ["very_negative"]) == [0]
+	assert SearchService.search(index, categories = ["neutral", "positive"]) == [3, 4]
+
+
+def test_polarity_bounds_are_inclusive(index):
+	assert SearchService.search(index, min_polarity = 0.7) == [1]
+	assert SearchService.search(index, max_polarity = 0.1, min_polarity = 0.1) == [4]
+	assert SearchService.search(index, max_polarity = -0.3) == [0, 2]
+
+
+def test_scores_round_trip(index):
+	assert SearchService.scores(index, 1) == result(0.7, "very_positive")
+
+
+def test_cached_index_does_not_reload_data():
+	service = SearchService(cache_size = 1)
+	data = SearchService.build_index(TEXTS, RESULTS)
+	loads = []
+
+	def load():
+		loads.append(1)
+		return data
+
+	service.get_index(1, load)
+	service.get_index(1, load)
+	assert len(loads) == 1
+
+	service.get_index(2, load)
+	service.get_index(1, load)
+	assert len(loads) == 3
+
+
+CSV = b'id,text\n0,"multi\nline"\n1,b\n2,c\n3,d\n'
+
+
+@pytest.mark.parametrize("file_type, data", [
+	("csv", CSV),
+	("jsonl", b'{"id": 0, "text": "a"}\n{"id": 1, "text": "b"}\n{"id": 2, "text": "c"}\n{"id": 3, "text": "d"}\n'),
+	("json", b'[{"id": 0, "text": "a"}, {"id": 1, "text": "b"}, {"id": 2, "text": "c"}, {"id": 3, "text": "d"}]'),
+])
+def test_read_rows_returns_requested_positions(file_type, data):
+	dataset = SimpleNamespace(file_data = compression.compress(data, "gzip"), file_codec = "gzip", file_type = file_type)
+
+	rows = DatasetService.read_rows(dataset, [3, 1])
+
+	assert rows.index.tolist() == [1, 3]
+	assert rows["id"].tolist() == [1, 3]
+
+
+def test_read_rows_counts_records_not_blank_lines():
+	data = b"id,review\n1,a\n\n2,x\n3,z\n4,y\n"
+	dataset = SimpleNamespace(file_data = data, file_codec = None, file_type = "csv")
+
+	rows = DatasetService.read_rows(dataset, [0, 3])
+
+	# Positions match the records read_dataset (and so the index) sees
+	expected = DatasetService.read_dataset(dataset).iloc[[0, 3]]
+	assert rows.index.tolist() == [0, 3]
+	assert rows["id"].tolist() == expected["id"].tolist() == [1, 4]
+
+
+def test_row_blocks_return_requested_rows():
+	df = pd.DataFrame({"id": range(25), "text": [f"row {i}" for i in range(25)]})
+	blocks = dict(DatasetService.encode_row_blocks(df, block_size = 10))
+
+	assert sorted(blocks) == [0, 1, 2]
+	rows = DatasetService.decode_rows({1: blocks[1], 2: blocks[2]}, [24, 10], block_size = 10)
+	assert rows == {24: {"id": 24, "text": "row 24"}, 10: {"id": 10, "text": "row 10"}}